@@ -5,6 +5,7 @@
 
 import argparse
 import codecs
+import sys
 
 from vietnamese_cleaner.vietnamese_cleaners import vietnamese_cleaner
 
@@ -15,11 +16,13 @@ if __name__ == "__main__":
 
     lines = {}
     with codecs.open(args.text, "r", "utf-8") as fid:
-        for line in fid.readlines():
-            id, _, content = line.split("|")
+        for line in fid:
+            id, _, content = line.partition("|")
+            _, _, content = content.partition("|")
 
             clean_content = vietnamese_cleaner(content)
             lines[id] = clean_content
 
-        for id in sorted(lines.keys()):
-            print(f"{id} {lines[id]}")
+        sys.stdout.write(
+            "".join(f"{id} {content}\n" for id, content in sorted(lines.items()))
+        )
@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
 import argparse
 import logging
+import threading
+from collections import OrderedDict
 from io import BytesIO
 from pathlib import Path
+from queue import Full, Queue
 from typing import Optional, Tuple
 
 import humanfriendly
@@ -19,6 +22,11 @@ from espnet2.fileio.vad_scp import VADScpReader
 from espnet2.utils.types import str2bool
 from espnet.utils.cli_utils import get_commandline_args
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 
 def humanfriendly_or_none(value: str):
     if value in ("none", "None", "NONE"):
@@ -39,28 +47,43 @@ def str2int_tuple(integers: str) -> Optional[Tuple[int, ...]]:
     return tuple(map(int, integers.strip().split(",")))
 
 
-@typechecked
+if njit is not None:
+
+    @njit(cache=True, boundscheck=False)
+    def _vad_gather(wav, orig_start_frames, durations, out):
+        # copy the segments one after the other, without an index array
+        pos = 0
+        for i in range(orig_start_frames.shape[0]):
+            start, duration = orig_start_frames[i], durations[i]
+            out[pos : pos + duration] = wav[start : start + duration]
+            pos += duration
+
+else:
+    _vad_gather = None
+
+
 def vad_trim(vad_reader: VADScpReader, uttid: str, wav: np.array, fs: int) -> np.array:
     # Conduct trim wtih vad information
 
     assert uttid in vad_reader, uttid
 
-    vad_info = vad_reader[uttid]
-    total_length = sum(int((time[1] - time[0]) * fs) for time in vad_info)
-    new_wav = np.zeros((total_length,), dtype=wav.dtype)
-    start_frame = 0
-    for time in vad_info:
-        # Note: we regard vad as [xxx, yyy)
-        duration = int((time[1] - time[0]) * fs)
-        orig_start_frame = int(time[0] * fs)
-        orig_end_frame = orig_start_frame + duration
+    vad_info = np.asarray(vad_reader[uttid], dtype=np.float64).reshape(-1, 2)
+    # Note: we regard vad as [xxx, yyy)
+    orig_start_frames = (vad_info[:, 0] * fs).astype(np.int64)
+    durations = ((vad_info[:, 1] - vad_info[:, 0]) * fs).astype(np.int64)
+    if _vad_gather is not None:
+        new_wav = np.empty((durations.sum(),) + wav.shape[1:], dtype=wav.dtype)
+        _vad_gather(wav, orig_start_frames, durations, new_wav)
+        return new_wav
 
-        end_frame = start_frame + duration
-        new_wav[start_frame:end_frame] = wav[orig_start_frame:orig_end_frame]
+    # start frame of each segment in the trimmed wav
+    start_frames = np.cumsum(durations) - durations
 
-        start_frame = end_frame
-
-    return new_wav
+    # gather all the segments at once: the i-th frame of the trimmed wav
+    # belonging to segment k is read from orig_start_frames[k] + i - start_frames[k]
+    indices = np.repeat(orig_start_frames - start_frames, durations)
+    indices += np.arange(len(indices))
+    return wav[indices]
 
 
 class SegmentsExtractor:
@@ -70,12 +93,25 @@ class SegmentsExtractor:
         segments (str): The file format is
             "<segment-id> <recording-id> <start-time> <end-time>\n"
             "e.g. call-861225-A-0050-0065 call-861225-A 5.0 6.5\n"
+        max_cache_bytes (int): Upper bound of the memory used to keep decoded
+            recordings that are still referred by later segments.
+        max_open_files (int): Maximum number of seekable recordings kept open.
+            Only the segments are read from these files.
     """
 
     @typechecked
-    def __init__(self, fname: str, segments: str = None, multi_columns: bool = False):
+    def __init__(
+        self,
+        fname: str,
+        segments: str = None,
+        multi_columns: bool = False,
+        max_cache_bytes: int = 512 * 1024**2,
+        max_open_files: int = 64,
+    ):
         self.wav_scp = fname
         self.multi_columns = multi_columns
+        self.max_cache_bytes = max_cache_bytes
+        self.max_open_files = max_open_files
         self.wav_dict = {}
         with open(self.wav_scp, "r") as f:
             for line in f:
@@ -99,50 +135,163 @@ class SegmentsExtractor:
                         'Not found "{}" in {}'.format(recodeid, self.wav_scp)
                     )
 
+    def _read(self, recodeid):
+        wavpath = self.wav_dict[recodeid]
+        if wavpath.endswith("|"):
+            if self.multi_columns:
+                raise RuntimeError(
+                    "Not supporting multi_columns wav.scp for inputs by pipe"
+                )
+            # Streaming input e.g. cat a.wav |
+            with kaldiio.open_like_kaldi(wavpath, "rb") as f:
+                with BytesIO(f.read()) as g:
+                    array, rate = soundfile.read(g)
+
+        else:
+            if self.multi_columns:
+                array, rate = soundfile_read(
+                    wavs=wavpath.split(),
+                    dtype=None,
+                    always_2d=False,
+                    concat_axis=1,
+                )
+            else:
+                array, rate = soundfile.read(wavpath)
+        return array, rate
+
+    def _open_seekable(self, recodeid):
+        wavpath = self.wav_dict[recodeid]
+        if wavpath.endswith("|") or self.multi_columns:
+            return None
+        f = soundfile.SoundFile(wavpath)
+        if not f.seekable():
+            f.close()
+            return None
+        return f
+
     def generator(self):
         recodeid_counter = {}
         for utt, (recodeid, st, et) in self.segments_dict.items():
             recodeid_counter[recodeid] = recodeid_counter.get(recodeid, 0) + 1
 
-        cached = {}
-        for utt, (recodeid, st, et) in self.segments_dict.items():
-            wavpath = self.wav_dict[recodeid]
-            if recodeid not in cached:
-                if wavpath.endswith("|"):
-                    if self.multi_columns:
-                        raise RuntimeError(
-                            "Not supporting multi_columns wav.scp for inputs by pipe"
-                        )
-                    # Streaming input e.g. cat a.wav |
-                    with kaldiio.open_like_kaldi(wavpath, "rb") as f:
-                        with BytesIO(f.read()) as g:
-                            array, rate = soundfile.read(g)
-
+        # Seekable files are kept open and only the segments are read from them.
+        # Other inputs (pipes, multi columns) are decoded in full and cached.
+        # Both are ordered from the least recently used.
+        open_files = OrderedDict()  # recodeid -> soundfile.SoundFile
+        cached = OrderedDict()  # recodeid -> (array, rate)
+        cached_bytes = 0
+        try:
+            for utt, (recodeid, st, et) in self.segments_dict.items():
+                # Keep file/array until the last query
+                recodeid_counter[recodeid] -= 1
+                last_query = recodeid_counter[recodeid] == 0
+
+                if recodeid in open_files:
+                    open_files.move_to_end(recodeid)
+                elif recodeid not in cached:
+                    f = self._open_seekable(recodeid)
+                    if f is not None:
+                        open_files[recodeid] = f
+                        if len(open_files) > self.max_open_files:
+                            open_files.popitem(last=False)[1].close()
+
+                if recodeid in open_files:
+                    f = open_files[recodeid]
+                    rate = f.samplerate
+                    # Convert starting time of the segment to corresponding
+                    # sample number. If end time is -1 then use the whole file
+                    # starting from start time.
+                    start = min(int(st * rate), f.frames)
+                    end = f.frames if et == -1 else min(int(et * rate), f.frames)
+                    f.seek(start)
+                    array = f.read(max(end - start, 0))
+                    if last_query:
+                        open_files.pop(recodeid).close()
+                    yield utt, (array, rate), None, None
+                    continue
+
+                if recodeid in cached:
+                    cached.move_to_end(recodeid)
                 else:
-                    if self.multi_columns:
-                        array, rate = soundfile_read(
-                            wavs=wavpath.split(),
-                            dtype=None,
-                            always_2d=False,
-                            concat_axis=1,
-                        )
-                    else:
-                        array, rate = soundfile.read(wavpath)
-                cached[recodeid] = array, rate
-
-            array, rate = cached[recodeid]
-            # Keep array until the last query
-            recodeid_counter[recodeid] -= 1
-            if recodeid_counter[recodeid] == 0:
-                cached.pop(recodeid)
-            # Convert starting time of the segment to corresponding sample number.
-            # If end time is -1 then use the whole file starting from start time.
-            if et != -1:
-                array = array[int(st * rate) : int(et * rate)]
-            else:
-                array = array[int(st * rate) :]
+                    cached[recodeid] = self._read(recodeid)
+                    cached_bytes += cached[recodeid][0].nbytes
+                    # If segments of many recordings are interleaved, drop the
+                    # least recently used ones. They are read again if queried.
+                    while cached_bytes > self.max_cache_bytes and len(cached) > 1:
+                        _, (old_array, _) = cached.popitem(last=False)
+                        cached_bytes -= old_array.nbytes
+
+                array, rate = cached[recodeid]
+                if last_query:
+                    cached.pop(recodeid)
+                    cached_bytes -= array.nbytes
+                # Convert starting time of the segment to corresponding sample
+                # number. If end time is -1 then use the whole file starting from
+                # start time.
+                if et != -1:
+                    array = array[int(st * rate) : int(et * rate)]
+                else:
+                    array = array[int(st * rate) :]
+
+                yield utt, (array, rate), None, None
+        finally:
+            for f in open_files.values():
+                f.close()
 
-            yield utt, (array, rate), None, None
+
+def prefetch(iterable, size: int):
+    """Iterate over the items of iterable in a background thread.
+
+    At most "size" items are read ahead, so that decoding the audio files
+    overlaps with the processing of the consumer.
+    soundfile releases the GIL while reading, so a thread is enough for this.
+    """
+    if size <= 0:
+        yield from iterable
+        return
+
+    queue = Queue(maxsize=size)
+    end = object()
+    stop = threading.Event()
+    iterator = iter(iterable)
+
+    def put(item):
+        # give up if the consumer stopped, instead of blocking forever
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+
+    def producer():
+        try:
+            for item in iterator:
+                if not put((item, None)):
+                    return
+        except Exception as e:
+            put((end, e))
+        else:
+            put((end, None))
+        finally:
+            # e.g. close the files opened by a generator in this thread
+            if hasattr(iterator, "close"):
+                iterator.close()
+
+    thread = threading.Thread(target=producer, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = queue.get()
+            if item is end:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+        thread.join()
 
 
 def main():
@@ -202,9 +351,17 @@ def main():
             "'ID ID-CH0.wav ID-CH1.wav'"
         ),
     )
+    parser.add_argument(
+        "--num_prefetch",
+        type=int,
+        default=2,
+        help="The number of utterances read ahead in a background thread. "
+        "They are all kept in memory, 0 disables prefetching.",
+    )
     args = parser.parse_args()
 
-    out_num_samples = Path(args.outdir) / "utt2num_samples"
+    outdir = Path(args.outdir)
+    out_num_samples = outdir / "utt2num_samples"
 
     if args.ref_channels is not None:
 
@@ -224,11 +381,11 @@ def main():
     if args.audio_format.endswith("ark") and args.multi_columns_output:
         raise RuntimeError("Multi columns wav.scp is not supported for ark type")
 
-    Path(args.outdir).mkdir(parents=True, exist_ok=True)
-    out_wavscp = Path(args.outdir) / f"{args.name}.scp"
+    outdir.mkdir(parents=True, exist_ok=True)
+    out_wavscp = outdir / f"{args.name}.scp"
 
     if args.audio_format.endswith("ark"):
-        fark = open(Path(args.outdir) / f"data_{args.name}.ark", "wb")
+        fark = open(outdir / f"data_{args.name}.ark", "wb")
         fscp_out = out_wavscp.open("w")
         writer = None
     else:
@@ -288,7 +445,9 @@ def main():
                     yield uttid, (wave, rate), wavpath, subtypes
 
     with out_num_samples.open("w") as fnum_samples:
-        for uttid, (wave, rate), wavpath, subtypes in tqdm(generator()):
+        for uttid, (wave, rate), wavpath, subtypes in tqdm(
+            prefetch(generator(), args.num_prefetch)
+        ):
             save_asis = True
             if args.fs is not None and args.fs != rate:
                 # FIXME(kamo): To use sox?
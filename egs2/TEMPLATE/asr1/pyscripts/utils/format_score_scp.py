@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 import argparse
 import logging
-import os
+import shutil
 from pathlib import Path
 
 from espnet.utils.cli_utils import get_commandline_args
@@ -26,9 +26,10 @@ def main():
     parser.add_argument("--segments", default=None)
     args = parser.parse_args()
 
+    outdir = Path(args.outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+    scpfile = outdir / f"{args.name}.scp"
     if args.segments is not None:
-        scpfile = Path(args.outdir) / f"{args.name}.scp"
-        scpfile.parent.mkdir(parents=True, exist_ok=True)
         fscp = scpfile.open("w", encoding="utf-8")
         dic = {}
         with open(args.scp) as fpath:
@@ -44,8 +45,7 @@ def main():
         fscp.close()
 
     else:
-        Path(args.outdir).mkdir(parents=True, exist_ok=True)
-        os.system("cp {} {}".format(args.scp, Path(args.outdir) / f"{args.name}.scp"))
+        shutil.copyfile(args.scp, scpfile)
 
 
 if __name__ == "__main__":
@@ -6,24 +6,25 @@ import sys
 import evaluate
 import numpy as np
 
+
+def read_text(text_file):
+    text_dict = {}
+    with open(text_file, "r") as f:
+        for line in f:
+            key, _, value = line.strip().partition(" ")
+            text_dict[key] = value
+    return text_dict
+
+
 ref_file = sys.argv[1]
 hyp_file = sys.argv[2]
 
-with open(ref_file, "r") as f:
-    ref_dict = {
-        line.strip().split(" ")[0]: " ".join(line.strip().split(" ")[1:])
-        for line in f.readlines()
-    }
-
-with open(hyp_file, "r") as f:
-    hyp_dict = {
-        line.strip().split(" ")[0]: " ".join(line.strip().split(" ")[1:])
-        for line in f.readlines()
-    }
-
-keys = [k for k, v in hyp_dict.items()]
-labels = [ref_dict[k] for k, _ in hyp_dict.items()]
-decoded_preds = [v for k, v in hyp_dict.items()]
+ref_dict = read_text(ref_file)
+hyp_dict = read_text(hyp_file)
+
+keys = list(hyp_dict)
+labels = [ref_dict[k] for k in keys]
+decoded_preds = list(hyp_dict.values())
 
 
 summ_metrics = evaluate.combine(["rouge", "meteor"])
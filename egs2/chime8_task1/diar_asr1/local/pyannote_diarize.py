@@ -1,186 +1,319 @@
 import argparse
-import glob
 import json
 import math
 import os.path
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import numpy as np
 import soundfile as sf
 import torch
+import torch.nn.functional as F
+import torchaudio
 from pyannote.audio import Model, Pipeline
 from pyannote.audio.core.inference import Inference
 from pyannote.audio.pipelines import SpeakerDiarization
-from pyannote.audio.utils.signal import Binarize, binarize
-from pyannote.core import SlidingWindowFeature
+from pyannote.audio.utils.signal import Binarize
+from pyannote.core import SlidingWindow, SlidingWindowFeature
 from pyannote.metrics.segmentation import Annotation, Segment
-from scipy.signal import medfilt2d
+from scipy import ndimage
 
 IS_CUDA = torch.cuda.is_available()
-
-
-def split_maxlen(utt_group, min_len=10):
-    # merge if
+# caps the number of sessions running segmentation/embedding extraction at once
+GPU_SEM = threading.Semaphore(int(os.environ.get("DIARIZE_GPU_WORKERS", "1")))
+# the pipeline (clustering, reconstruction) is shared by all the sessions and
+# it is not thread-safe, its CPU part is run by one session at a time.
+PIPELINE_LOCK = threading.Lock()
+# CUDA graph replay is not thread-safe, the compiled segmentation model is run
+# by one session at a time.
+SEGMENTATION_LOCK = threading.Lock()
+
+
+def split_maxlen(starts, ends, min_len=10):
+    # greedily group consecutive segments so that each group is at least min_len
+    # long, ends are sorted as segments of the same speaker do not overlap.
     out = []
-    stack = []
-    for utt in utt_group:
-        if not stack or (utt.end - stack[0].start) < min_len:
-            stack.append(utt)
-            continue
-
-        out.append(Segment(stack[0].start, stack[-1].end))
-        stack = [utt]
-
-    if len(stack):
-        out.append(Segment(stack[0].start, stack[-1].end))
+    first = 0
+    while first < len(starts):
+        last = max(first + 1, np.searchsorted(ends, starts[first] + min_len))
+        out.append((starts[first], ends[last - 1]))
+        first = last
 
     return out
 
 
-def merge_closer(annotation, delta=1.0, max_len=60, min_len=10):
+def merge_closer(annotation, delta=1.0, max_len=60, min_len=10, offset=0.0):
     name = annotation.uri
     speakers = annotation.labels()
     new_annotation = Annotation(uri=name)
     for spk in speakers:
         c_segments = sorted(annotation.label_timeline(spk), key=lambda x: x.start)
-        stack = []
-        for seg in c_segments:
-            if not stack or abs(stack[-1].end - seg.start) < delta:
-                stack.append(seg)
-                continue  # continue
-
-            # more than delta, save the current max seg
-            if (stack[-1].end - stack[0].start) > max_len:
+        starts = np.array([seg.start for seg in c_segments]) + offset
+        ends = np.array([seg.end for seg in c_segments]) + offset
+        # merge if less than delta apart from the previous segment
+        new_run = np.concatenate([[True], np.abs(starts[1:] - ends[:-1]) >= delta])
+        run_first = np.flatnonzero(new_run)
+        run_last = np.append(run_first[1:], len(starts)) - 1
+        too_long = (ends[run_last] - starts[run_first]) > max_len
+        # the last run of a speaker is never split
+        too_long[-1] = False
+        for first, last, split in zip(run_first, run_last, too_long):
+            if split:
                 # break into parts of 10 seconds at least
-                for sub_seg in split_maxlen(stack, min_len):
-                    new_annotation[sub_seg] = spk
-                stack = [seg]
+                merged = split_maxlen(
+                    starts[first : last + 1], ends[first : last + 1], min_len
+                )
             else:
-                new_annotation[Segment(stack[0].start, stack[-1].end)] = spk
-                stack = [seg]
-
-        if len(stack):
-            new_annotation[Segment(stack[0].start, stack[-1].end)] = spk
+                merged = [(starts[first], ends[last])]
+            for start, end in merged:
+                new_annotation[Segment(start, end)] = spk
 
     return new_annotation
 
 
-def rttm2json(rttm_file):
-    with open(rttm_file, "r") as f:
-        rttm = f.readlines()
+def median_filter(x, kernel_size=7, dim=0):
+    # same as scipy.signal.medfilt2d with a (kernel_size, 1) kernel applied
+    # along dim (zero padded), but running on the device where x is.
+    if not x.is_cuda:
+        # on cpu filter the N-D array in place, without reshaping it to 2-D
+        size = [1] * x.dim()
+        size[dim] = kernel_size
+        return torch.from_numpy(
+            ndimage.median_filter(x.numpy(), size=size, mode="constant")
+        )
+    pad = kernel_size // 2
+    x = F.pad(x.movedim(dim, -1), (pad, pad))
+    x = x.unfold(-1, kernel_size, 1).median(-1).values
+    return x.movedim(-1, dim)
 
-    rttm = [x.rstrip("\n") for x in rttm]
-    filename = Path(rttm_file).stem
+
+def inference_autocast(half_precision=False):
+    # segmentation and embedding models tolerate fp16, model outputs are cast
+    # back to fp32 so that clustering still runs in full precision.
+    return torch.autocast(
+        device_type="cuda", dtype=torch.float16, enabled=IS_CUDA and half_precision
+    )
+
+
+def compile_pipeline(pipeline):
+    # models are reused for all the sessions, so compiling them once amortizes
+    # the python and kernel launch overhead. The segmentation model uses CUDA
+    # graphs ("reduce-overhead"), its batches have then to be of fixed size and
+    # its forward is serialized with SEGMENTATION_LOCK across the workers.
+    inference = pipeline._segmentation
+    inference.model = torch.compile(inference.model, mode="reduce-overhead")
+    infer = inference.infer
+
+    def locked_infer(chunks):
+        with SEGMENTATION_LOCK:
+            return infer(chunks)
+
+    inference.infer = locked_infer
+    embedding_model = getattr(pipeline._embedding, "model_", None)
+    if isinstance(embedding_model, torch.nn.Module):
+        pipeline._embedding.model_ = torch.compile(embedding_model)
+
+
+def warm_up_pipeline(pipeline, half_precision=False):
+    # run a dummy batch, so that compilation is not charged to a session.
+    # CUDA graphs are recorded per thread, this is run in each worker thread.
+    inference = pipeline._segmentation
+    window_size = round(inference.duration * inference.model.audio.sample_rate)
+    with GPU_SEM, inference_autocast(half_precision):
+        inference.infer(torch.zeros((inference.batch_size, 1, window_size)))
+
+
+def rttm2json(rttm_file):
+    rttm_file = Path(rttm_file)
+    filename = rttm_file.stem
 
     to_json = []
-    for line in rttm:
-        current = line.split(" ")
-        start = current[3]
-        duration = current[4]
-        stop = str(float(start) + float(duration))
-        speaker = current[7]
-        session = filename
-        to_json.append(
-            {
-                "session_id": session,
-                "speaker": speaker,
-                "start_time": start,
-                "end_time": stop,
-                "words": "dummy words",
-            }
-        )
+    with open(rttm_file, "r") as f:
+        for line in f:
+            current = line.rstrip("\n").split(" ")
+            start = current[3]
+            duration = current[4]
+            stop = str(float(start) + float(duration))
+            speaker = current[7]
+            session = filename
+            to_json.append(
+                {
+                    "session_id": session,
+                    "speaker": speaker,
+                    "start_time": start,
+                    "end_time": stop,
+                    "words": "dummy words",
+                }
+            )
 
     to_json = sorted(to_json, key=lambda x: float(x["start_time"]))
-    with open(
-        os.path.join(Path(rttm_file).parent, Path(rttm_file).stem + ".json"), "w"
-    ) as f:
+    with open(rttm_file.with_suffix(".json"), "w") as f:
         json.dump(to_json, f, indent=4)
 
 
-def diarize_session(
-    sess_name,
-    pipeline,
-    wav_files,
-    uem_boundaries=None,
-    merge_closer_delta=1.5,
-    max_length_merged=60,
-    max_n_speakers=8,
-):
+def load_session_audio(wav_files, uem_boundaries=None):
+    # CPU-only part of the session processing, it is run outside GPU_SEM so that
+    # the audio of the next session can be read while the current one is on GPU.
     # take the min len across all wavs
-    minlen = min([sf.SoundFile(w).frames for w in wav_files])
-    fs = sf.SoundFile(wav_files[0]).samplerate
+    audio_infos = [sf.info(w) for w in wav_files]
+    minlen = min([x.frames for x in audio_infos])
+    fs = audio_infos[0].samplerate
     if uem_boundaries is not None:
         uem_boundaries = [round(x * fs) for x in uem_boundaries]
     else:
         uem_boundaries = [0, minlen]
 
-    # now for each audio file run inference
-    all_segmentation = []
-    all_audio = []
-    print("Running Segmentation on each of the {} channels".format(len(wav_files)))
-    for w_f in wav_files:
-        c_audio, c_fs = sf.read(w_f, dtype="float32")
+    # only the uem region is read, directly into a buffer holding all channels,
+    # pinned memory allows a non blocking copy to the GPU later on.
+    start, stop = uem_boundaries[0], min(minlen, uem_boundaries[1])
+    all_audio = torch.empty(
+        (len(wav_files), stop - start), dtype=torch.float32, pin_memory=IS_CUDA
+    )
+    for w_f, c_audio in zip(wav_files, all_audio.numpy()):
+        _, c_fs = sf.read(w_f, start=start, stop=stop, dtype="float32", out=c_audio)
         assert fs == c_fs
-        c_audio = c_audio[: min(minlen, uem_boundaries[1])]
-        c_audio = c_audio[uem_boundaries[0] :]
-        c_audio = torch.from_numpy(c_audio[None, ...])
-        if (c_audio**2).mean() < 1e-8:
+
+    # cheap probe on a decimated view, done on cpu so that the dead channels
+    # are not even copied to the GPU.
+    active = all_audio[:, ::256].pow(2).mean(-1) >= 1e-8
+    if not active.all():
+        for w_f in np.array(wav_files)[~active.numpy()]:
             print(
                 "Not running inference on {}, because the signal amplitude is "
-                "too low, is it all zeros ?".format(c_audio)
+                "too low, is it all zeros ?".format(w_f)
             )
-            continue
+        all_audio = all_audio[active]
         if IS_CUDA:
-            c_audio = c_audio.cuda()
-        c_seg = pipeline.get_segmentations({"waveform": c_audio, "sample_rate": fs})
-        c_seg = binarize(
-            c_seg,
-            onset=pipeline.segmentation.threshold,
-            initial_state=False,
-        )
+            all_audio = all_audio.pin_memory()
 
-        all_segmentation.append(c_seg)  # move to cpu for less mem consumption
-        all_audio.append(c_audio)
-
-    # here we select the best channel based on one with most activations.
-    # not an optimal criterion but at least the clustering afterwards will be fast.
-    sliding_window = all_segmentation[0].sliding_window
-    all_audio = torch.cat(all_audio, 0)
-    num_channels = all_audio.shape[0]
-    num_chunks, frames, local_spk = all_segmentation[0].data.shape
-    all_segmentation = SlidingWindowFeature(
-        np.stack([x.data for x in all_segmentation], -1),
-        sliding_window,
+    return all_audio, fs, uem_boundaries
+
+
+def get_multichannel_segmentations(
+    pipeline, waveforms, sample_rate, fixed_batch_size=False
+):
+    """Multi-channel version of pipeline.get_segmentations.
+
+    The chunks of all the channels are extracted as in pyannote Inference.slide
+    but they are forwarded to the segmentation model together, instead of
+    running the sliding window inference once for each channel.
+    As in Inference, the waveforms are first resampled to the sample rate of
+    the segmentation model.
+    If fixed_batch_size is True, the last batch is zero padded to the full batch
+    size, so that a compiled model always sees the same input shape.
+
+    Returns a SlidingWindowFeature with shape
+    (num_chunks, frames, local_spk, num_channels).
+    """
+    inference = pipeline._segmentation
+    model_rate = inference.model.audio.sample_rate
+    if sample_rate != model_rate:
+        waveforms = torchaudio.functional.resample(waveforms, sample_rate, model_rate)
+    window_size = round(inference.duration * model_rate)
+    step_size = round(inference.step * model_rate)
+    num_channels, num_samples = waveforms.shape
+
+    # complete chunks, shape (num_channels, num_chunks, window_size)
+    if num_samples >= window_size:
+        chunks = waveforms.unfold(1, window_size, step_size)
+    else:
+        chunks = waveforms.new_zeros((num_channels, 0, window_size))
+    num_chunks = chunks.shape[1]
+    # last incomplete chunk, zero padded
+    has_last_chunk = (num_samples < window_size) or (
+        num_samples - window_size
+    ) % step_size > 0
+    if has_last_chunk:
+        last_chunk = waveforms[:, num_chunks * step_size :]
+        last_chunk = F.pad(last_chunk, (0, window_size - last_chunk.shape[-1]))
+        chunks = torch.cat([chunks, last_chunk[:, None]], 1)
+        num_chunks += 1
+
+    # channels are folded into the batch dimension
+    chunks = chunks.reshape(num_channels * num_chunks, 1, window_size)
+    if fixed_batch_size:
+        chunks = F.pad(chunks, (0, 0, 0, 0, 0, -len(chunks) % inference.batch_size))
+    outputs = np.vstack(
+        [
+            inference.infer(chunks[c : c + inference.batch_size])
+            for c in range(0, len(chunks), inference.batch_size)
+        ]
+    ).astype(np.float32, copy=False)[: num_channels * num_chunks]
+    outputs = outputs.reshape((num_channels, num_chunks) + outputs.shape[1:])
+    return SlidingWindowFeature(
+        outputs.transpose(1, 2, 3, 0),
+        SlidingWindow(start=0.0, duration=inference.duration, step=inference.step),
     )
 
-    selected_audio = torch.zeros_like(c_audio)
-    selected_seg = []
-    print("Running Channel Selection by using the segmentation output")
-    for indx, (seg_b, segmentation) in enumerate(all_segmentation):
-        c_seg = all_audio[:, math.floor(seg_b.start * fs) : math.floor(seg_b.end * fs)]
+
+def diarize_session(
+    sess_name,
+    pipeline,
+    wav_files,
+    uem_boundaries=None,
+    merge_closer_delta=1.5,
+    max_length_merged=60,
+    max_n_speakers=8,
+    session_audio=None,
+    half_precision=False,
+    fixed_batch_size=False,
+):
+    if session_audio is None:
+        session_audio = load_session_audio(wav_files, uem_boundaries)
+    all_audio, fs, uem_boundaries = session_audio
+
+    # now run inference on all the audio files at once
+    # the audio is on the GPU only while GPU_SEM is held, so that the semaphore
+    # bounds the device memory used by the concurrent sessions.
+    print("Running Segmentation on each of the {} channels".format(len(all_audio)))
+    with GPU_SEM, inference_autocast(half_precision):
+        device_audio = all_audio.cuda(non_blocking=True) if IS_CUDA else all_audio
+        all_segmentation = get_multichannel_segmentations(
+            pipeline, device_audio, fs, fixed_batch_size
+        )
+
+        # here we select the best channel based on one with most activations.
+        # not an optimal criterion but at least the clustering afterwards will be
+        # fast. binarization, filtering and selection are done for all the chunks
+        # at once on the audio device, only the selected segmentation is moved
+        # back to cpu.
+        sliding_window = all_segmentation.sliding_window
+        num_chunks = all_segmentation.data.shape[0]
+        segmentation = torch.as_tensor(
+            all_segmentation.data, device=device_audio.device
+        )
+        segmentation = (segmentation > pipeline.segmentation.threshold).float()
         # median filter here seems to improve performance on chime6 in high overlap
         # conditions
-        segmentation = medfilt2d(
-            segmentation.reshape((frames, local_spk * num_channels)), (7, 1)
-        ).reshape((frames, local_spk, num_channels))
+        segmentation = median_filter(segmentation, kernel_size=7, dim=1)
+        print("Running Channel Selection by using the segmentation output")
         # why not the fine-tuned model is used ?
         # because that one is trained on chime6 to be robust against noise and
         # reverberation and position of the mic.
         # we want instead a model that is not so robust against that to use
         # to select the best channel from which the embeddings will be extracted.
-        selection = np.argmax(
-            segmentation.sum((0, 1))
-        )  # not the best selection criteria
+        # not the best selection criteria
+        selection = segmentation.sum((1, 2)).argmax(-1)
         # however this keeps it simple and fast.
-        selected_audio[:, math.floor(seg_b.start * fs) : math.floor(seg_b.end * fs)] = (
-            c_seg[selection]
+        selected_seg = SlidingWindowFeature(
+            segmentation.permute(0, 3, 1, 2)[
+                torch.arange(num_chunks, device=selection.device), selection
+            ]
+            .cpu()
+            .numpy(),
+            sliding_window,
         )
-        selected_seg.append(segmentation[..., selection])
-    # stack em
-    selected_seg = SlidingWindowFeature(
-        np.stack([x.data for x in selected_seg]), sliding_window
-    )
+        selection = selection.tolist()
+        del device_audio, segmentation
+    # the selected audio is gathered from the host buffer, it is copied to the
+    # GPU by the embedding inference, inside GPU_SEM.
+    selected_audio = torch.zeros_like(all_audio[:1])
+    for indx, c_selection in enumerate(selection):
+        seg_b = sliding_window[indx]
+        start, end = math.floor(seg_b.start * fs), math.floor(seg_b.end * fs)
+        selected_audio[:, start:end] = all_audio[c_selection, start:end]
     count = Inference.trim(
         selected_seg, warm_up=(0.1, 0.1)
     )  # default value in Pyannote
@@ -193,68 +326,67 @@ def diarize_session(
     )
     count.data = np.rint(count.data).astype(np.uint8)
     print("Extracting Embeddings.")
-    embeddings = pipeline.get_embeddings(
-        {"waveform": selected_audio, "sample_rate": fs},
-        selected_seg,
-        exclude_overlap=pipeline.embedding_exclude_overlap,
-    )
+    with GPU_SEM, inference_autocast(half_precision):
+        embeddings = pipeline.get_embeddings(
+            {"waveform": selected_audio, "sample_rate": fs},
+            selected_seg,
+            exclude_overlap=pipeline.embedding_exclude_overlap,
+        ).astype(np.float32, copy=False)
     #  shape: (num_chunks, local_num_speakers, dimension)
     print("Clustering.")
-    hard_clusters, _ = pipeline.clustering(
-        embeddings=embeddings,
-        segmentations=selected_seg,
-        num_clusters=None,
-        min_clusters=2,
-        max_clusters=max_n_speakers,  # max-speakers are ok
-        file={
-            "waveform": selected_audio,
-            "sample_rate": fs,
-        },  # <== for oracle clustering
-        frames=pipeline._frames,  # <== for oracle clustering
-    )
-
-    # reconstruct discrete diarization from raw hard clusters
-    # keep track of inactive speakers
-    inactive_speakers = np.sum(selected_seg.data, axis=1) == 0
-    #  shape: (num_chunks, num_speakers)
-    hard_clusters[inactive_speakers] = -2
-    # reshape now to multi-channel
-    discrete_diarization = pipeline.reconstruct(
-        selected_seg,
-        hard_clusters,
-        count,
-    )
-    # convert to annotation
-    to_annotation = Binarize(
-        onset=0.5,
-        offset=0.5,
-        min_duration_on=pipeline.segmentation.min_duration_on,
-        min_duration_off=pipeline.segmentation.min_duration_off,
-        pad_onset=pipeline.segmentation.pad_onset,
-        pad_offset=pipeline.segmentation.pad_offset,
-    )
-    result = to_annotation(discrete_diarization)
-    offset = uem_boundaries[0] / fs
-    new_annotation = Annotation(uri=sess_name)  # new annotation
-    speakers = result.labels()
-    for spk in speakers:
-        for seg in result.label_timeline(spk):
-            new_annotation[Segment(seg.start + offset, seg.end + offset)] = spk
+    with PIPELINE_LOCK:
+        hard_clusters, _ = pipeline.clustering(
+            embeddings=embeddings,
+            segmentations=selected_seg,
+            num_clusters=None,
+            min_clusters=2,
+            max_clusters=max_n_speakers,  # max-speakers are ok
+            file={
+                "waveform": selected_audio,
+                "sample_rate": fs,
+            },  # <== for oracle clustering
+            frames=pipeline._frames,  # <== for oracle clustering
+        )
 
+        # reconstruct discrete diarization from raw hard clusters
+        # keep track of inactive speakers
+        inactive_speakers = np.sum(selected_seg.data, axis=1) == 0
+        #  shape: (num_chunks, num_speakers)
+        hard_clusters[inactive_speakers] = -2
+        # reshape now to multi-channel
+        discrete_diarization = pipeline.reconstruct(
+            selected_seg,
+            hard_clusters,
+            count,
+        )
+        # convert to annotation
+        to_annotation = Binarize(
+            onset=0.5,
+            offset=0.5,
+            min_duration_on=pipeline.segmentation.min_duration_on,
+            min_duration_off=pipeline.segmentation.min_duration_off,
+            pad_onset=pipeline.segmentation.pad_onset,
+            pad_offset=pipeline.segmentation.pad_offset,
+        )
+        result = to_annotation(discrete_diarization)
+    result.uri = sess_name
+    # the uem offset is added while merging, in the same pass
     new_annotation = merge_closer(
-        new_annotation, delta=merge_closer_delta, max_len=max_length_merged, min_len=10
+        result,
+        delta=merge_closer_delta,
+        max_len=max_length_merged,
+        min_len=10,
+        offset=uem_boundaries[0] / fs,
     )
     return new_annotation
 
 
 def read_uem(uem_file):
-    with open(uem_file, "r") as f:
-        lines = f.readlines()
-    lines = [x.rstrip("\n") for x in lines]
     uem2sess = {}
-    for x in lines:
-        sess_id, _, start, stop = x.split(" ")
-        uem2sess[sess_id] = (float(start), float(stop))
+    with open(uem_file, "r") as f:
+        for x in f:
+            sess_id, _, start, stop = x.rstrip("\n").split(" ")
+            uem2sess[sess_id] = (float(start), float(stop))
     return uem2sess
 
 
@@ -359,6 +491,30 @@ if __name__ == "__main__":
         metavar="STR",
         dest="merge_closer",
     )
+    parser.add_argument(
+        "--num_workers",
+        type=int,
+        default=1,
+        help="Number of sessions processed concurrently. "
+        "The number of sessions using the GPU at the same time is "
+        "capped by the DIARIZE_GPU_WORKERS environment variable (default 1).",
+        metavar="INT",
+        dest="num_workers",
+    )
+    parser.add_argument(
+        "--half_precision",
+        action="store_true",
+        help="Run segmentation and embeddings extraction with fp16 autocast "
+        "on GPU. Activations are halved, so --max_batch_size can be increased.",
+        dest="half_precision",
+    )
+    parser.add_argument(
+        "--compile",
+        action="store_true",
+        help="Compile the segmentation and embedding models with torch.compile "
+        "before processing the sessions.",
+        dest="compile",
+    )
 
     args = parser.parse_args()
     pretrained_pipeline = Pipeline.from_pretrained(
@@ -381,6 +537,8 @@ if __name__ == "__main__":
         embedding=pretrained_pipeline.embedding,
         embedding_exclude_overlap=pretrained_pipeline.embedding_exclude_overlap,
         clustering=pretrained_pipeline.klustering,
+        segmentation_batch_size=args.max_batch_size,
+        embedding_batch_size=args.max_batch_size,
     )
 
     # we do not change the hyper-parameters of the original
@@ -401,30 +559,38 @@ if __name__ == "__main__":
         "method"
     ]
 
+    if args.compile:
+        compile_pipeline(diarization_pipeline)
+
     Path(args.out_dir).mkdir(exist_ok=True, parents=True)
-    audio_f = glob.glob(os.path.join(args.in_dir, "*.wav")) + glob.glob(
-        os.path.join(args.in_dir, "*.flac")
-    )
-    audio_f = [x for x in audio_f if re.search(args.mic_regex, Path(x).stem)]
+    mic_re = re.compile(args.mic_regex)
+    # single directory scan for both wav and flac files
+    audio_f = {}  # filename -> path
+    for x in os.scandir(args.in_dir):
+        filename, ext = os.path.splitext(x.name)
+        if ext in (".wav", ".flac") and mic_re.search(filename):
+            audio_f[filename] = x.path
 
     if args.uem_file:
         uem_map = read_uem(args.uem_file)
         # joint diarization of all mics
         sess2audio = {}
-        for audio_file in audio_f:
-            filename = Path(audio_file).stem
-            sess_name = re.search(args.sess_regex, filename).group()
+        sess_re = re.compile(args.sess_regex)
+        for filename, audio_file in audio_f.items():
+            sess_name = sess_re.search(filename).group()
             if sess_name not in sess2audio.keys():
                 sess2audio[sess_name] = []
             sess2audio[sess_name].append(audio_file)
 
-        # now for each session
-        for sess in sess2audio.keys():
+        def process_session(sess):
             print("Diarizing Session {}".format(sess))
             if args.uem_file:
                 c_uem = uem_map[sess]
             else:
                 c_uem = None
+            # reading the audio and writing the results is done outside
+            # GPU_SEM, so it overlaps with the GPU work of the other sessions.
+            session_audio = load_session_audio(sess2audio[sess], c_uem)
             c_result = diarize_session(
                 sess,
                 diarization_pipeline,
@@ -433,8 +599,20 @@ if __name__ == "__main__":
                 float(args.merge_closer),
                 float(args.max_length_merged),
                 args.max_speakers,
+                session_audio=session_audio,
+                half_precision=args.half_precision,
+                fixed_batch_size=args.compile,
             )
             c_rttm_out = os.path.join(args.out_dir, sess + ".rttm")
             with open(c_rttm_out, "w") as f:
                 f.write(c_result.to_rttm())
             rttm2json(c_rttm_out)
+
+        # now for each session
+        with ThreadPoolExecutor(
+            max_workers=args.num_workers,
+            initializer=warm_up_pipeline if args.compile else None,
+            initargs=(diarization_pipeline, args.half_precision),
+        ) as executor:
+            # consume the iterator so that exceptions are raised here
+            list(executor.map(process_session, sess2audio.keys()))
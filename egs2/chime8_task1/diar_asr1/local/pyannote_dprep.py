@@ -4,12 +4,19 @@ import json
 import math
 import os.path
 import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 
 import soundfile as sf
 import tqdm
 from pyannote.metrics.segmentation import Annotation, Segment
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 def round_down(n, decimals=0):
     multiplier = 10**decimals
@@ -17,26 +24,47 @@ def round_down(n, decimals=0):
 
 
 def json2annotation(chimelike_jsonf, uri=None, spk_prefix=None):
-    with open(chimelike_jsonf, "r") as f:
-        json_ann = json.load(f)
-
-    def to_annotation(segs, uri=None, spk_prefix=None):
-        out = Annotation(uri=uri)
-        for s in segs:
+    with open(chimelike_jsonf, "rb") as f:
+        json_ann = orjson.loads(f.read()) if orjson is not None else json.load(f)
+
+    out = Annotation(uri=uri)
+    spk_names = {}  # avoids building the prefixed name for each segment
+    for s in json_ann:
+        speaker = spk_names.get(s["speaker"])
+        if speaker is None:
             speaker = s["speaker"]
             if spk_prefix is not None:
                 speaker = spk_prefix + "_" + speaker
-            start = float(s["start_time"])
-            end = float(s["end_time"])
-            out[Segment(start, end)] = speaker
-        return out
-
-    return to_annotation(json_ann, uri, spk_prefix)
+            spk_names[s["speaker"]] = speaker
+        out[Segment(float(s["start_time"]), float(s["end_time"]))] = speaker
+    return out
+
+
+def process_file(audio_f, filename, c_rttm, c_uem, c_rttm_dir, c_uem_dir):
+    # put the filename here
+    with open(os.path.join(c_rttm_dir, filename + ".rttm"), "w") as f:
+        f.writelines(c_rttm.replace("PLACEHOLDER", filename))
+    # writing uem
+    # NOTE: we recreate here uem for each file, to assure that they
+    # will be not out of bounds as pyannote otherwise will throw errors
+    # during training.
+    audio_info = sf.info(audio_f)
+    c_uem = [
+        c_uem[0],
+        round_down(audio_info.frames / audio_info.samplerate, 2),
+    ]
+    # in evaluation we use the correct CHiME-7 DASR .uem
+    with open(os.path.join(c_uem_dir, filename + ".uem"), "w") as f:
+        f.write("{} 1 {} {}\n".format(filename, c_uem[0], c_uem[1]))
+    return filename  # uri
 
 
 # FIXME add notsofar1 synth and AMI in the fine-tuning
 def prepare4pyannote(
-    chime7dasr_root, target_dir="./data/pyannote_diarization", falign_annotation=None
+    chime7dasr_root,
+    target_dir="./data/pyannote_diarization",
+    falign_annotation=None,
+    nj=None,
 ):
     for dset in ["chime6", "dipco", "mixer6"]:
         print("Running Pyannote data preparation for {} scenario".format(dset))
@@ -49,11 +77,16 @@ def prepare4pyannote(
         else:
             mic_regex = "(?!CH01|CH02|CH03)(CH[0-9]+)"
             sess_regex = "([0-9]+_[0-9]+_(LDC|HRM)_[0-9]+)"
+        mic_re = re.compile(mic_regex)
+        sess_re = re.compile(sess_regex)
 
         for split in c_splits:
-            audio_files = glob.glob(os.path.join(c_scenario, "audio", split, "*.wav"))
-            audio_files += glob.glob(os.path.join(c_scenario, "audio", split, "*.flac"))
-            audio_files = [x for x in audio_files if re.search(mic_regex, Path(x).stem)]
+            # single directory scan for both wav and flac files
+            audio_files = {}  # filename (uri) -> path
+            for x in os.scandir(os.path.join(c_scenario, "audio", split)):
+                filename, ext = os.path.splitext(x.name)
+                if ext in (".wav", ".flac") and mic_re.search(filename):
+                    audio_files[filename] = x.path
             # exclude close-talk ones here
             if falign_annotation is not None and dset == "chime6":
                 json_folder = os.path.join(falign_annotation, split, "*.json")
@@ -70,12 +103,11 @@ def prepare4pyannote(
                 )
 
             uem = os.path.join(c_scenario, "uem", split, "all.uem")
-            with open(uem, "r") as f:
-                uem_lines = f.readlines()
             sess2uem = {}
-            for x in uem_lines:
-                sess_id, _, start, stop = x.rstrip("\n").split(" ")
-                sess2uem[sess_id] = (float(start), float(stop))
+            with open(uem, "r") as f:
+                for x in f:
+                    sess_id, _, start, stop = x.rstrip("\n").split(" ")
+                    sess2uem[sess_id] = (float(start), float(stop))
 
             # now for each recording uri we need an rttm and an uem and dump it
             # into the target dir
@@ -86,30 +118,26 @@ def prepare4pyannote(
             c_uri_dir = os.path.join(target_dir, dset, split, "uris")
             Path(c_uri_dir).mkdir(exist_ok=True, parents=True)
 
-            to_uri_list = []
-            for audio_f in tqdm.tqdm(audio_files):
-                filename = Path(audio_f).stem
-                to_uri_list.append(filename)  # append uri here
-                session = re.search(sess_regex, filename).group()  # sess regex here
-                c_ann = sess2json[session]
-                c_uem = sess2uem[session]
-                # put the filename here
-                with open(os.path.join(c_rttm_dir, filename + ".rttm"), "w") as f:
-                    f.writelines(c_ann.to_rttm().replace("PLACEHOLDER", filename))
-                # writing uem
-                # NOTE: we recreate here uem for each file, to assure that they
-                # will be not out of bounds as pyannote otherwise will throw errors
-                # during training.
-                c_uem = [
-                    c_uem[0],
-                    round_down(
-                        sf.SoundFile(audio_f).frames / sf.SoundFile(audio_f).samplerate,
-                        2,
-                    ),
-                ]
-                # in evaluation we use the correct CHiME-7 DASR .uem
-                with open(os.path.join(c_uem_dir, filename + ".uem"), "w") as f:
-                    f.write("{} 1 {} {}\n".format(filename, c_uem[0], c_uem[1]))
+            # files are independent, process them in parallel
+            sessions = [sess_re.search(x).group() for x in audio_files]
+            # the rttm of each session is the same for all its files
+            sess2rttm = {sess: sess2json[sess].to_rttm() for sess in set(sessions)}
+            with ProcessPoolExecutor(max_workers=nj) as executor:
+                to_uri_list = list(
+                    tqdm.tqdm(
+                        executor.map(
+                            process_file,
+                            audio_files.values(),
+                            audio_files.keys(),
+                            [sess2rttm[sess] for sess in sessions],
+                            [sess2uem[sess] for sess in sessions],
+                            repeat(c_rttm_dir),
+                            repeat(c_uem_dir),
+                            chunksize=64,
+                        ),
+                        total=len(audio_files),
+                    )
+                )
 
             # write the files uris
             to_uri_list = sorted(to_uri_list)
@@ -157,10 +185,21 @@ if __name__ == "__main__":
         "The forced alignment annotation is available in "
         "https://github.com/chimechallenge/CHiME7_DASR_falign",
     )
+    parser.add_argument(
+        "--nj",
+        type=int,
+        required=False,
+        default=None,
+        metavar="INT",
+        dest="nj",
+        help="Number of parallel jobs used to process the audio files. "
+        "Defaults to the number of CPUs.",
+    )
     args = parser.parse_args()
 
     prepare4pyannote(
         args.dasr_root,
         args.output_root,
         None if not len(args.falign_dir) else args.falign_dir,
+        args.nj,
     )
@@ -6,6 +6,8 @@
 
 """Automatic speech recognition model training script."""
 
+import copy
+import io
 import logging
 import os
 import random
@@ -20,6 +22,27 @@ from espnet.utils.cli_utils import strtobool
 from espnet.utils.training.batchfy import BATCH_COUNT_CHOICES
 
 
+class CachedYAMLConfigFileParser(configargparse.YAMLConfigFileParser):
+    """YAML config file parser loading each config file only once.
+
+    main() parses the arguments twice (before and after adding the model
+    specific arguments), so the config files would be loaded twice otherwise.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._cache = {}
+
+    def parse(self, stream):
+        """Parse the config file or return the result of the previous parse."""
+        contents = stream.read()
+        if contents not in self._cache:
+            cached_stream = io.StringIO(contents)
+            cached_stream.name = getattr(stream, "name", "stream")
+            self._cache[contents] = super().parse(cached_stream)
+        return copy.deepcopy(self._cache[contents])
+
+
 # NOTE: you need this func to generate our sphinx doc
 def get_parser(parser=None, required=True):
     """Get default arguments."""
@@ -27,7 +50,7 @@ def get_parser(parser=None, required=True):
         parser = configargparse.ArgumentParser(
             description="Train an automatic speech recognition (ASR) model on one CPU, "
             "one or multiple GPUs",
-            config_file_parser_class=configargparse.YAMLConfigFileParser,
+            config_file_parser_class=CachedYAMLConfigFileParser,
             formatter_class=configargparse.ArgumentDefaultsHelpFormatter,
         )
     # general configuration
@@ -617,10 +640,8 @@ def main(cmd_args):
 
     # load dictionary for debug log
     if args.dict is not None:
-        with open(args.dict, "rb") as f:
-            dictionary = f.readlines()
-        char_list = [entry.decode("utf-8").split(" ")[0] for entry in dictionary]
-        char_list.insert(0, "<blank>")
+        with open(args.dict, "r", encoding="utf-8") as f:
+            char_list = ["<blank>"] + [line.partition(" ")[0] for line in f]
         char_list.append("<eos>")
         # for non-autoregressive maskctc model
         if "maskctc" in args.model_module:
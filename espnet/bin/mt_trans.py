@@ -14,6 +14,8 @@ import sys
 import configargparse
 import numpy as np
 
+from espnet.utils.cli_utils import strtobool
+
 
 # NOTE: you need this func to generate our sphinx doc
 def get_parser():
@@ -119,6 +121,29 @@ def get_parser():
         type=str,
         help="target language ID (e.g., <en>, <de>, and <fr> etc.)",
     )
+    # quantize model related
+    parser.add_argument(
+        "--quantize-config",
+        nargs="*",
+        help="""Config for dynamic quantization provided as a list of modules,
+        separated by a space. E.g.: --quantize-config Linear LSTM GRU.
+        Each specified module should be an attribute of 'torch.nn', e.g.:
+        torch.nn.Linear, torch.nn.LSTM, torch.nn.GRU, ...""",
+    )
+    parser.add_argument(
+        "--quantize-dtype",
+        type=str,
+        default="qint8",
+        choices=["float16", "qint8"],
+        help="Dtype for dynamic quantization.",
+    )
+    parser.add_argument(
+        "--quantize-mt-model",
+        type=strtobool,
+        default=False,
+        help="Apply dynamic quantization to the encoder of MT model. "
+        "Only supported on CPU.",
+    )
     return parser
 
 
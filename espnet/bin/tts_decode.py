@@ -7,6 +7,7 @@
 
 import logging
 import os
+import socket
 import subprocess
 import sys
 
@@ -135,7 +136,7 @@ def main(args):
 
     # check CUDA_VISIBLE_DEVICES
     if args.ngpu > 0:
-        if "clsp.jhu.edu" in subprocess.check_output(["hostname", "-f"]).decode():
+        if "clsp.jhu.edu" in socket.getfqdn():
             cvd = (
                 subprocess.check_output(
                     ["/usr/local/bin/free-gpu", "-n", str(args.ngpu)]
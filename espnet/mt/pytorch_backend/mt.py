@@ -504,6 +504,39 @@ def train(args):
     check_early_stop(trainer, args.epochs)
 
 
+def quantize_mt_model(model, quantize_config=None, quantize_dtype="qint8"):
+    """Apply dynamic quantization to the encoder of the model.
+
+    Only the encoder is quantized, the embeddings and the decoder are kept
+    as they are. The quantized model only runs on CPU.
+
+    Args:
+        model (torch.nn.Module): The MT model.
+        quantize_config (list): Names of the modules of 'torch.nn' to quantize
+            in the encoder, e.g. ["Linear", "LSTM"]. Defaults to ["Linear"].
+        quantize_dtype (str): "qint8" or "float16".
+
+    Returns:
+        torch.nn.Module: The model with a quantized encoder.
+
+    """
+    if quantize_config is not None:
+        q_config = set([getattr(torch.nn, q) for q in quantize_config])
+    else:
+        q_config = {torch.nn.Linear}
+    dtype = getattr(torch, quantize_dtype)
+    for name in ("enc", "encoder"):
+        if isinstance(getattr(model, name, None), torch.nn.Module):
+            setattr(
+                model,
+                name,
+                torch.quantization.quantize_dynamic(
+                    getattr(model, name), q_config, dtype=dtype
+                ),
+            )
+    return model
+
+
 def trans(args):
     """Decode with the given args.
 
@@ -516,6 +549,13 @@ def trans(args):
     assert isinstance(model, MTInterface)
     model.trans_args = args
 
+    if getattr(args, "quantize_mt_model", False):
+        # dynamically quantized modules only run on cpu
+        if args.ngpu > 0:
+            raise ValueError("--quantize-mt-model is not supported with --ngpu > 0.")
+        logging.info("Use a quantized MT encoder for decoding.")
+        model = quantize_mt_model(model, args.quantize_config, args.quantize_dtype)
+
     # gpu
     if args.ngpu == 1:
         gpu_id = list(range(args.ngpu))
@@ -567,10 +607,7 @@ def trans(args):
             for names in grouper(args.batchsize, keys, None):
                 names = [name for name in names if name]
                 feats = [
-                    np.fromiter(
-                        map(int, js[name]["output"][1]["tokenid"].split()),
-                        dtype=np.int64,
-                    )
+                    np.array(js[name]["output"][1]["tokenid"].split(), dtype=np.int64)
                     for name in names
                 ]
                 nbest_hyps = model.translate_batch(
@@ -4,6 +4,7 @@ import logging
 from typing import Any  # noqa: H301
 from typing import Dict  # noqa: H301
 from typing import List  # noqa: H301
+from typing import Optional  # noqa: H301
 from typing import Tuple  # noqa: H301
 
 import torch
@@ -18,6 +19,34 @@ from espnet.nets.beam_search_timesync_streaming import BeamSearchTimeSyncStreami
 from espnet.nets.e2e_asr_common import end_detect
 
 
+def detect_eos_and_repetition(
+    yseq: torch.Tensor,
+    length: torch.Tensor,
+    eos: int,
+    check_repetition: bool = True,
+) -> Tuple[torch.Tensor, Optional[torch.Tensor]]:
+    """Detect the hypotheses ending with <eos> or repeating their last token.
+
+    Args:
+        yseq (torch.Tensor): Token ids of the hypotheses (n_batch, L)
+        length (torch.Tensor): Lengths of the hypotheses (n_batch,)
+        eos (int): End of sequence id
+        check_repetition (bool): If False, skip the repetition check
+
+    Returns:
+        Tuple[torch.Tensor, Optional[torch.Tensor]]: Whether each hypothesis ends
+            with <eos>, and whether each one not ending with <eos> repeats its
+            last token (None if `check_repetition` is False).
+
+    """
+    last_token = yseq.gather(1, (length - 1).unsqueeze(1)).squeeze(1)
+    is_eos = last_token == eos
+    if not check_repetition:
+        return is_eos, None
+    is_repeated = (yseq[:, :-1] == yseq[:, -1:]).any(dim=1) & ~is_eos
+    return is_eos, is_repeated
+
+
 class BatchBeamSearchOnline(BatchBeamSearch):
     """Online beam search implementation.
 
@@ -90,13 +119,16 @@ class BatchBeamSearchOnline(BatchBeamSearch):
     def reset(self):
         """Reset parameters."""
         self.encbuffer = None
+        self.enc_len = 0
         self.running_hyps = None
         self.prev_hyps = []
         self.ended_hyps = []
+        self.ended_hyps_dicts = []
         self.processed_block = 0
         self.process_idx = 0
         self.prev_output = None
         self.prev_incremental = None
+        self.extended_len = None
 
     def score_full(
         self,
@@ -122,22 +154,30 @@ class BatchBeamSearchOnline(BatchBeamSearch):
         """
         scores = dict()
         states = dict()
-        for k, d in self.full_scorers.items():
-            if (
-                self.decoder_text_length_limit > 0
-                and len(hyp.yseq) > 0
-                and len(hyp.yseq[0]) > self.decoder_text_length_limit
-            ):
-                temp_yseq = hyp.yseq.narrow(
-                    1, -self.decoder_text_length_limit, self.decoder_text_length_limit
-                ).clone()
-                temp_yseq[:, 0] = self.sos
-                self.running_hyps.states["decoder"] = [
-                    None for _ in self.running_hyps.states["decoder"]
-                ]
-            else:
-                temp_yseq = hyp.yseq
+        if (
+            self.decoder_text_length_limit > 0
+            and len(hyp.yseq) > 0
+            and len(hyp.yseq[0]) > self.decoder_text_length_limit
+        ):
+            # keep the last tokens, with <sos> in place of the first one
+            temp_yseq = torch.cat(
+                [
+                    hyp.yseq.new_full((hyp.yseq.shape[0], 1), self.sos),
+                    hyp.yseq.narrow(
+                        1,
+                        -self.decoder_text_length_limit + 1,
+                        self.decoder_text_length_limit - 1,
+                    ),
+                ],
+                dim=1,
+            )
+            self.running_hyps.states["decoder"] = [
+                None for _ in self.running_hyps.states["decoder"]
+            ]
+        else:
+            temp_yseq = hyp.yseq
 
+        for k, d in self.full_scorers.items():
             if "decoder" in k and self.return_hs:
                 (scores[k], hs), states[k] = d.batch_score(
                     temp_yseq, hyp.states[k], x, return_hs=self.return_hs
@@ -173,10 +213,11 @@ class BatchBeamSearchOnline(BatchBeamSearch):
         """
         if self.encbuffer is None or self.block_size == 0:
             self.encbuffer = x
+            self.enc_len = x.shape[0]
         else:
-            self.encbuffer = torch.cat([self.encbuffer, x], axis=0)
+            self.append_encbuffer(x)
 
-        x = self.encbuffer
+        x = self.encbuffer[: self.enc_len]
 
         # set length bounds
         if maxlenratio == 0:
@@ -302,13 +343,12 @@ class BatchBeamSearchOnline(BatchBeamSearch):
         # blockwise processing w/ rewinding
         else:
             ret = None
+            x_len = x.shape[0]
+            first_end_frame = self.block_size - self.look_ahead
+            length_limit = self.encoded_feat_length_limit
             while True:
-                cur_end_frame = (
-                    self.block_size
-                    - self.look_ahead
-                    + self.hop_size * self.processed_block
-                )
-                if cur_end_frame < x.shape[0]:
+                cur_end_frame = first_end_frame + self.hop_size * self.processed_block
+                if cur_end_frame < x_len:
                     h = x.narrow(0, 0, cur_end_frame)
                     block_is_final = False
                 else:
@@ -320,19 +360,12 @@ class BatchBeamSearchOnline(BatchBeamSearch):
 
                 logging.debug("Start processing block: %d", self.processed_block)
                 logging.debug(
-                    "  Feature length: {}, current position: {}".format(
-                        h.shape[0], self.process_idx
-                    )
+                    "  Feature length: %d, current position: %d",
+                    h.shape[0],
+                    self.process_idx,
                 )
-                if (
-                    self.encoded_feat_length_limit > 0
-                    and h.shape[0] > self.encoded_feat_length_limit
-                ):
-                    h = h.narrow(
-                        0,
-                        h.shape[0] - self.encoded_feat_length_limit,
-                        self.encoded_feat_length_limit,
-                    )
+                if length_limit > 0 and h.shape[0] > length_limit:
+                    h = h.narrow(0, h.shape[0] - length_limit, length_limit)
 
                 if self.running_hyps is None:
                     self.running_hyps = self.init_hyp(h)
@@ -372,6 +405,26 @@ class BatchBeamSearchOnline(BatchBeamSearch):
                 # N-best results
                 return ret
 
+    def append_encbuffer(self, x: torch.Tensor):
+        """Append encoded features to the buffer of the received blocks.
+
+        The buffer grows geometrically, so that the features received so far
+        are not copied every time a new block arrives.
+
+        Args:
+            x (torch.Tensor): Encoded speech feature of the new block (T, D)
+
+        """
+        new_len = self.enc_len + x.shape[0]
+        if new_len > self.encbuffer.shape[0]:
+            encbuffer = self.encbuffer.new_empty(
+                (max(2 * self.encbuffer.shape[0], new_len),) + self.encbuffer.shape[1:]
+            )
+            encbuffer[: self.enc_len] = self.encbuffer[: self.enc_len]
+            self.encbuffer = encbuffer
+        self.encbuffer[self.enc_len : new_len] = x
+        self.enc_len = new_len
+
     def process_one_block_time_sync(self, h, is_final, maxlen, maxlenratio):
         """Recognize one block w/ time sync."""
         hyps = self.time_sync_search(
@@ -380,8 +433,11 @@ class BatchBeamSearchOnline(BatchBeamSearch):
             is_final=is_final,
             incremental_decode=self.incremental_decode,
         )
-        logging.debug("time:" + str(self.t))
-        logging.debug("best_hyp:" + "".join([self.token_list[x] for x in hyps[0].yseq]))
+        logging.debug("time: %d", self.t)
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug(
+                "best_hyp:" + "".join([self.token_list[x] for x in hyps[0].yseq])
+            )
         if is_final:
             self.t = 0
         else:
@@ -390,10 +446,12 @@ class BatchBeamSearchOnline(BatchBeamSearch):
 
     def process_one_block(self, h, is_final, maxlen, minlen, maxlenratio):
         """Recognize one block."""
-        # extend states for ctc
-        self.extend(h, self.running_hyps)
+        # extend states for ctc, unless no encoded frames were added since then
+        if h.shape[0] != self.extended_len:
+            self.extend(h, self.running_hyps, start=self.extended_len or 0)
+            self.extended_len = h.shape[0]
         while self.process_idx < maxlen:
-            logging.debug("position " + str(self.process_idx))
+            logging.debug("position %d", self.process_idx)
             best = self.search(self.running_hyps, h)
 
             if self.process_idx == maxlen - 1:
@@ -401,30 +459,24 @@ class BatchBeamSearchOnline(BatchBeamSearch):
                 self.running_hyps = self.post_process(
                     self.process_idx, maxlen, minlen, maxlenratio, best, self.ended_hyps
                 )
-            n_batch = best.yseq.shape[0]
-            local_ended_hyps = []
-            is_local_eos = best.yseq[torch.arange(n_batch), best.length - 1] == self.eos
-            prev_repeat = False
-            for i in range(is_local_eos.shape[0]):
-                if is_local_eos[i]:
-                    hyp = self._select(best, i)
-                    local_ended_hyps.append(hyp)
-                # NOTE(tsunoo): check repetitions here
-                # This is a implicit implementation of
-                # Eq (11) in https://arxiv.org/abs/2006.14941
-                # A flag prev_repeat is used instead of using set
-                # NOTE(fujihara): I made it possible to turned off
-                # the below lines using disable_repetition_detection flag,
-                # because this criteria is too sensitive that the beam
-                # search starts only after the entire inputs are available.
-                # Empirically, this flag didn't affect the performance.
-                elif (
-                    not self.disable_repetition_detection
-                    and not prev_repeat
-                    and best.yseq[i, -1] in best.yseq[i, :-1]
-                    and not is_final
-                ):
-                    prev_repeat = True
+            check_repetition = not self.disable_repetition_detection and not is_final
+            is_local_eos, is_repeated = detect_eos_and_repetition(
+                best.yseq, best.length, self.eos, check_repetition
+            )
+            local_ended_hyps = [
+                self._select(best, i)
+                for i in torch.nonzero(is_local_eos).view(-1).tolist()
+            ]
+            # NOTE(tsunoo): check repetitions here
+            # This is a implicit implementation of
+            # Eq (11) in https://arxiv.org/abs/2006.14941
+            # A flag prev_repeat is used instead of using set
+            # NOTE(fujihara): I made it possible to turned off
+            # the below lines using disable_repetition_detection flag,
+            # because this criteria is too sensitive that the beam
+            # search starts only after the entire inputs are available.
+            # Empirically, this flag didn't affect the performance.
+            prev_repeat = is_repeated is not None and bool(is_repeated.any())
             if prev_repeat:
                 logging.info("Detected repetition.")
                 break
@@ -432,9 +484,7 @@ class BatchBeamSearchOnline(BatchBeamSearch):
             if (
                 is_final
                 and maxlenratio == 0.0
-                and end_detect(
-                    [lh.asdict() for lh in self.ended_hyps], self.process_idx
-                )
+                and end_detect(self.get_ended_hyps_dicts(), self.process_idx)
             ):
                 logging.info(f"end detected at {self.process_idx}")
                 return self.assemble_hyps(self.ended_hyps)
@@ -446,9 +496,11 @@ class BatchBeamSearchOnline(BatchBeamSearch):
                 # is 2 behind the ended hyps, not 1
 
             self.prev_hyps = self.running_hyps
-            self.running_hyps = self.post_process(
-                self.process_idx, maxlen, minlen, maxlenratio, best, self.ended_hyps
-            )
+            if self.process_idx < maxlen - 1:
+                # the last step has already been post-processed above
+                self.running_hyps = self.post_process(
+                    self.process_idx, maxlen, minlen, maxlenratio, best, self.ended_hyps
+                )
 
             if is_final:
                 for hyp in local_ended_hyps:
@@ -458,7 +510,7 @@ class BatchBeamSearchOnline(BatchBeamSearch):
                 logging.info("no hypothesis. Finish decoding.")
                 return self.assemble_hyps(self.ended_hyps)
             else:
-                logging.debug(f"remained hypotheses: {len(self.running_hyps)}")
+                logging.debug("remained hypotheses: %d", len(self.running_hyps))
             # increment number
             self.process_idx += 1
 
@@ -482,6 +534,20 @@ class BatchBeamSearchOnline(BatchBeamSearch):
             # N-best results
             return rets
 
+    def get_ended_hyps_dicts(self):
+        """Get `self.ended_hyps` as dicts, converting only the newly ended ones.
+
+        `self.ended_hyps` is only appended until `reset()`, so the dicts of the
+        hypotheses ended in the previous steps are kept.
+
+        Returns:
+            List[dict]: `asdict()` of each hypothesis in `self.ended_hyps`
+
+        """
+        for hyp in self.ended_hyps[len(self.ended_hyps_dicts) :]:
+            self.ended_hyps_dicts.append(hyp.asdict())
+        return self.ended_hyps_dicts
+
     def assemble_hyps(self, ended_hyps):
         """Assemble the hypotheses."""
         if self.normalize_length:
@@ -500,7 +566,9 @@ class BatchBeamSearchOnline(BatchBeamSearch):
             )
             return []
 
-        # report the best result
+        # report the best result, only if it is logged
+        if not logging.getLogger().isEnabledFor(logging.INFO):
+            return nbest_hyps
         best = nbest_hyps[0]
         for k, v in best.scores.items():
             logging.info(
@@ -512,17 +580,20 @@ class BatchBeamSearchOnline(BatchBeamSearch):
         if self.token_list is not None:
             logging.info(
                 "best hypo: "
-                + "".join([self.token_list[x] for x in best.yseq[1:-1]])
+                + "".join([self.token_list[x] for x in best.yseq[1:-1].tolist()])
                 + "\n"
             )
         return nbest_hyps
 
-    def extend(self, x: torch.Tensor, hyps: Hypothesis) -> List[Hypothesis]:
+    def extend(
+        self, x: torch.Tensor, hyps: Hypothesis, start: int = 0
+    ) -> List[Hypothesis]:
         """Extend probabilities and states with more encoded chunks.
 
         Args:
             x (torch.Tensor): The extended encoder output feature
             hyps (Hypothesis): Current list of hypothesis
+            start (int): The number of frames of x already given to the scorers
 
         Returns:
             Hypothesis: The extended hypothesis
@@ -530,6 +601,6 @@ class BatchBeamSearchOnline(BatchBeamSearch):
         """
         for k, d in self.scorers.items():
             if hasattr(d, "extend_prob"):
-                d.extend_prob(x)
+                d.extend_prob(x, start=start)
             if hasattr(d, "extend_state"):
                 hyps.states[k] = d.extend_state(hyps.states[k])
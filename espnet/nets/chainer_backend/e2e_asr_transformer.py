@@ -12,6 +12,7 @@ import numpy as np
 from chainer import reporter
 
 from espnet.nets.chainer_backend.asr_interface import ChainerASRInterface
+from espnet.nets.chainer_backend.nets_utils import get_topk
 from espnet.nets.chainer_backend.transformer import ctc
 from espnet.nets.chainer_backend.transformer.attention import MultiHeadAttention
 from espnet.nets.chainer_backend.transformer.decoder import Decoder
@@ -446,9 +447,8 @@ class E2E(ChainerASRInterface):
                     local_scores = local_att_scores
 
                 if lpz is not None:
-                    local_best_ids = xp.argsort(local_scores, axis=1)[0, ::-1][
-                        :ctc_beam
-                    ]
+                    _, local_best_ids = get_topk(xp, local_scores, ctc_beam, axis=1)
+                    local_best_ids = local_best_ids[0]
                     ctc_scores, ctc_states = ctc_prefix_score(
                         hyp["yseq"], local_best_ids, hyp["ctc_state_prev"]
                     )
@@ -459,14 +459,16 @@ class E2E(ChainerASRInterface):
                         local_scores += (
                             recog_args.lm_weight * local_lm_scores[:, local_best_ids]
                         )
-                    joint_best_ids = xp.argsort(local_scores, axis=1)[0, ::-1][:beam]
-                    local_best_scores = local_scores[:, joint_best_ids]
+                    local_best_scores, joint_best_ids = get_topk(
+                        xp, local_scores, beam, axis=1
+                    )
+                    joint_best_ids = joint_best_ids[0]
                     local_best_ids = local_best_ids[joint_best_ids]
                 else:
-                    local_best_ids = self.xp.argsort(local_scores, axis=1)[0, ::-1][
-                        :beam
-                    ]
-                    local_best_scores = local_scores[:, local_best_ids]
+                    local_best_scores, local_best_ids = get_topk(
+                        xp, local_scores, beam, axis=1
+                    )
+                    local_best_ids = local_best_ids[0]
 
                 for j in range(beam):
                     new_hyp = {}
@@ -5,3 +5,35 @@ def _subsamplex(x, n):
     x = [F.get_item(xx, (slice(None, None, n), slice(None))) for xx in x]
     ilens = [xx.shape[0] for xx in x]
     return x, ilens
+
+
+def get_topk(xp, x, k, axis=-1):
+    """Get the k largest values and their indices along the axis.
+
+    Only the k largest values are sorted, instead of the whole axis.
+    Ties are ordered as in ``argsort(x)[::-1][:k]``, larger indices first.
+
+    Args:
+        xp (module): numpy or cupy.
+        x (ndarray): Input array.
+        k (int): Number of values to get.
+        axis (int): Axis to get the values along.
+
+    Returns:
+        tuple(ndarray, ndarray): The k largest values and their indices
+            in descending order of the values.
+
+    """
+    n = x.shape[axis]
+    k = min(k, n)
+    rows = xp.moveaxis(x, axis, -1)
+    ids = []
+    for row in rows.reshape(-1, n):
+        # indices of the values not smaller than the k-th largest one,
+        # in decreasing order so that the stable sort puts them first on ties
+        kth = xp.partition(row, n - k)[n - k]
+        candidates = xp.flatnonzero(row >= kth)[::-1]
+        order = xp.argsort(-row[candidates], kind="stable")[:k]
+        ids.append(candidates[order])
+    ids = xp.moveaxis(xp.stack(ids).reshape(rows.shape[:-1] + (k,)), -1, axis)
+    return xp.take_along_axis(x, ids, axis=axis), ids
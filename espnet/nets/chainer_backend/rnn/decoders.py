@@ -8,6 +8,7 @@ import chainer.links as L
 import numpy as np
 
 import espnet.nets.chainer_backend.deterministic_embed_id as DL
+from espnet.nets.chainer_backend.nets_utils import get_topk
 from espnet.nets.ctc_prefix_score import CTCPrefixScore
 from espnet.nets.e2e_asr_common import end_detect
 
@@ -313,9 +314,10 @@ class Decoder(chainer.Chain):
                     local_scores = local_att_scores
 
                 if lpz is not None:
-                    local_best_ids = self.xp.argsort(local_scores, axis=1)[0, ::-1][
-                        :ctc_beam
-                    ]
+                    _, local_best_ids = get_topk(
+                        self.xp, local_scores, ctc_beam, axis=1
+                    )
+                    local_best_ids = local_best_ids[0]
                     ctc_scores, ctc_states = ctc_prefix_score(
                         hyp["yseq"], local_best_ids, hyp["ctc_state_prev"]
                     )
@@ -326,16 +328,16 @@ class Decoder(chainer.Chain):
                         local_scores += (
                             recog_args.lm_weight * local_lm_scores[:, local_best_ids]
                         )
-                    joint_best_ids = self.xp.argsort(local_scores, axis=1)[0, ::-1][
-                        :beam
-                    ]
-                    local_best_scores = local_scores[:, joint_best_ids]
+                    local_best_scores, joint_best_ids = get_topk(
+                        self.xp, local_scores, beam, axis=1
+                    )
+                    joint_best_ids = joint_best_ids[0]
                     local_best_ids = local_best_ids[joint_best_ids]
                 else:
-                    local_best_ids = self.xp.argsort(local_scores, axis=1)[0, ::-1][
-                        :beam
-                    ]
-                    local_best_scores = local_scores[:, local_best_ids]
+                    local_best_scores, local_best_ids = get_topk(
+                        self.xp, local_scores, beam, axis=1
+                    )
+                    local_best_ids = local_best_ids[0]
 
                 for j in range(beam):
                     new_hyp = {}
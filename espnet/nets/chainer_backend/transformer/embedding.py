@@ -24,13 +24,23 @@ class PositionalEncoding(chainer.Chain):
         unit_block = np.exp(
             np.arange(0, n_units, 2, dtype=np.float32) * -(np.log(10000.0) / n_units)
         )
-        self.pe = np.zeros((length, n_units), dtype=np.float32)
-        self.pe[:, ::2] = np.sin(posi_block * unit_block)
-        self.pe[:, 1::2] = np.cos(posi_block * unit_block)
-        self.scale = np.sqrt(n_units)
+        angle = posi_block * unit_block
+        # interleave sin/cos by filling a (length, n_units // 2, 2) array,
+        # which is contiguous and can be viewed as (length, n_units)
+        pe = np.empty((length, n_units // 2, 2), dtype=np.float32)
+        np.sin(angle, out=pe[:, :, 0])
+        np.cos(angle, out=pe[:, :, 1])
+        self.pe = pe.reshape(length, n_units)
+        self.scale = float(np.sqrt(n_units))
+        # copy of self.pe on the device of the link, made again when it moves
+        self._pe_on = None
+        self._pe_device = None
 
     def forward(self, e):
         """Forward Positional Encoding."""
         length = e.shape[1]
-        e = e * self.scale + self.xp.array(self.pe[:length])
+        if self._pe_on != self.device:
+            self._pe_device = self.device.send(self.pe)
+            self._pe_on = self.device
+        e = e * self.scale + self._pe_device[:length]
         return F.dropout(e, self.dropout)
@@ -7,7 +7,6 @@ import math
 
 import numpy as np
 from chainer import cuda
-from chainer import functions as F
 from chainer import training
 from chainer.training import extension
 from chainer.training.updaters.multiprocess_parallel_updater import (
@@ -244,6 +243,7 @@ class VaswaniRule(extension.Extension):
         """Initialize Vaswani rule extension."""
         self._attr = attr
         self._d_inv05 = d ** (-0.5) * scale
+        self._warmup_steps = warmup_steps
         self._warmup_steps_inv15 = warmup_steps ** (-1.5)
         self._init = init
         self._target = target
@@ -266,9 +266,11 @@ class VaswaniRule(extension.Extension):
         """Forward extension."""
         self._t += 1
         optimizer = self._get_optimizer(trainer)
-        value = self._d_inv05 * min(
-            self._t ** (-0.5), self._t * self._warmup_steps_inv15
-        )
+        # the warmup line is below t ** (-0.5) until t reaches warmup_steps
+        if self._t <= self._warmup_steps:
+            value = self._d_inv05 * (self._t * self._warmup_steps_inv15)
+        else:
+            value = self._d_inv05 * self._t ** (-0.5)
         self._update_value(optimizer, value)
 
     def serialize(self, serializer):
@@ -315,7 +317,12 @@ class CustomConverter(object):
         # batch should be located in list
         assert len(batch) == 1
         xs, ys = batch[0]
-        xs = F.pad_sequence(xs, padding=-1).data
-        # get batch of lengths of input sequences
-        ilens = np.array([x.shape[0] for x in xs], dtype=np.int32)
-        return xs, ilens, ys
+        # get batch of lengths of input sequences, before padding
+        ilens = np.fromiter((x.shape[0] for x in xs), dtype=np.int32, count=len(xs))
+        # pad with -1 by copying each sequence into a single allocated array
+        xs_pad = np.full(
+            (len(xs), ilens.max()) + xs[0].shape[1:], -1, dtype=xs[0].dtype
+        )
+        for i, x in enumerate(xs):
+            xs_pad[i, : x.shape[0]] = x
+        return xs_pad, ilens, ys
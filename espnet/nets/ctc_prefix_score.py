@@ -219,27 +219,22 @@ class CTCPrefixScoreTH(object):
         )
         return r_new, s_new, f_min, f_max
 
-    def extend_prob(self, x):
+    def extend_prob(self, x, start=0):
         """Extend CTC prob.
 
         :param torch.Tensor x: input label posterior sequences (B, T, O)
+        :param int start: index of the first frame of x in the whole sequence,
+            the posteriors of the frames given before are kept as they are
         """
-
-        if self.x.shape[1] < x.shape[1]:  # self.x (2,T,B,O); x (B,T,O)
-            # Pad the rest of posteriors in the batch
-            # TODO(takaaki-hori): need a better way without for-loops
-            xlens = [x.size(1)]
-            for i, l in enumerate(xlens):
-                if l < self.input_length:
-                    x[i, l:, :] = self.logzero
-                    x[i, l:, self.blank] = 0
-            tmp_x = self.x
-            xn = x.transpose(0, 1)  # (B, T, O) -> (T, B, O)
+        input_length = start + x.size(1)
+        if self.x.shape[1] < input_length:  # self.x (2,T,B,O); x (B,T,O)
+            assert start <= self.x.shape[1], (start, self.x.shape[1])
+            # use only the frames which are not given yet
+            xn = x[:, self.x.shape[1] - start :].transpose(0, 1)  # (B,T,O)->(T,B,O)
             xb = xn[:, :, self.blank].unsqueeze(2).expand(-1, -1, self.odim)
-            self.x = torch.stack([xn, xb])  # (2, T, B, O)
-            self.x[:, : tmp_x.shape[1], :, :] = tmp_x
-            self.input_length = x.size(1)
-            self.end_frames = torch.as_tensor(xlens) - 1
+            self.x = torch.cat([self.x, torch.stack([xn, xb])], dim=1)  # (2,T,B,O)
+            self.input_length = input_length
+            self.end_frames = torch.as_tensor([input_length]) - 1
 
     def extend_state(self, state):
         """Compute CTC prefix state.
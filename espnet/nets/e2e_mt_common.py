@@ -9,7 +9,6 @@
 from itertools import groupby
 
 import nltk
-import numpy as np
 
 
 class ErrorCalculator(object):
@@ -66,14 +65,13 @@ class ErrorCalculator(object):
         :rtype float
         """
         seqs_hat, seqs_true = [], []
-        for i, y_hat in enumerate(ys_hat):
-            y_true = ys_pad[i]
-            eos_true = np.where(y_true == -1)[0]
-            ymax = eos_true[0] if len(eos_true) > 0 else len(y_true)
+        # convert the whole batch at once, rather than each element
+        for y_hat, y_true in zip(ys_hat.tolist(), ys_pad.tolist()):
+            ymax = y_true.index(-1) if -1 in y_true else len(y_true)
             # NOTE: padding index (-1) in y_true is used to pad y_hat
             # because y_hats is not padded with -1
-            seq_hat = [self.char_list[int(idx)] for idx in y_hat[:ymax]]
-            seq_true = [self.char_list[int(idx)] for idx in y_true if int(idx) != -1]
+            seq_hat = [self.char_list[idx] for idx in y_hat[:ymax]]
+            seq_true = [self.char_list[idx] for idx in y_true if idx != -1]
             seq_hat_text = "".join(seq_hat).replace(self.space, " ")
             seq_hat_text = seq_hat_text.replace(self.pad, "")
             seq_true_text = "".join(seq_true).replace(self.space, " ")
@@ -91,19 +89,16 @@ class ErrorCalculator(object):
         :rtype float
         """
         seqs_hat, seqs_true = [], []
-        for i, y in enumerate(ys_hat):
+        for y, y_true in zip(ys_hat.tolist(), ys_pad.tolist()):
             y_hat = [x[0] for x in groupby(y)]
-            y_true = ys_pad[i]
             seq_hat, seq_true = [], []
             for idx in y_hat:
-                idx = int(idx)
                 if idx != -1 and idx != self.idx_blank and idx != self.idx_space:
-                    seq_hat.append(self.char_list[int(idx)])
+                    seq_hat.append(self.char_list[idx])
 
             for idx in y_true:
-                idx = int(idx)
                 if idx != -1 and idx != self.idx_blank and idx != self.idx_space:
-                    seq_true.append(self.char_list[int(idx)])
+                    seq_true.append(self.char_list[idx])
 
             seq_hat_text = "".join(seq_hat).replace(self.space, " ")
             seq_hat_text = seq_hat_text.replace(self.pad, "")
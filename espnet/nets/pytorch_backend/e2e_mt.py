@@ -209,6 +209,7 @@ class E2E(MTInterface, torch.nn.Module):
         """
         # 1. Encoder
         xs_pad, ys_pad = self.target_language_biasing(xs_pad, ilens, ys_pad)
+        xs_pad = xs_pad[:, : max(ilens)]  # for data parallel
         hs_pad, hlens, _ = self.enc(self.dropout(self.embed(xs_pad)), ilens)
 
         # 3. attention loss
@@ -232,13 +233,13 @@ class E2E(MTInterface, torch.nn.Module):
             list_of_refs = []
             hyps = []
             y_hats = [nbest_hyp[0]["yseq"][1:-1] for nbest_hyp in nbest_hyps]
+            # convert the references at once, not element by element
+            y_trues = ys_pad.tolist()
             for i, y_hat in enumerate(y_hats):
-                y_true = ys_pad[i]
+                y_true = y_trues[i]
 
                 seq_hat = [self.char_list[int(idx)] for idx in y_hat if int(idx) != -1]
-                seq_true = [
-                    self.char_list[int(idx)] for idx in y_true if int(idx) != -1
-                ]
+                seq_true = [self.char_list[idx] for idx in y_true if idx != -1]
                 seq_hat_text = "".join(seq_hat).replace(self.trans_args.space, " ")
                 seq_hat_text = seq_hat_text.replace(self.trans_args.blank, "")
                 seq_true_text = "".join(seq_true).replace(self.trans_args.space, " ")
@@ -292,23 +293,18 @@ class E2E(MTInterface, torch.nn.Module):
         prev = self.training
         self.eval()
 
-        # 1. encoder
-        # make a utt list (1) to use the same interface for encoder
-        if self.multilingual:
-            ilen = [len(x[0][1:])]
-            h = to_device(
-                self, torch.from_numpy(np.fromiter(map(int, x[0][1:]), dtype=np.int64))
-            )
-        else:
-            ilen = [len(x[0])]
-            h = to_device(
-                self, torch.from_numpy(np.fromiter(map(int, x[0]), dtype=np.int64))
-            )
-        hs, _, _ = self.enc(self.dropout(self.embed(h.unsqueeze(0))), ilen)
+        with torch.inference_mode():
+            # 1. encoder
+            # make a utt list (1) to use the same interface for encoder
+            # the source language ID is removed for multilingual models
+            src = x[0][1:] if self.multilingual else x[0]
+            ilen = [len(src)]
+            h = to_device(self, torch.from_numpy(np.array(src, dtype=np.int64)))
+            hs, _, _ = self.enc(self.dropout(self.embed(h.unsqueeze(0))), ilen)
 
-        # 2. decoder
-        # decode the first utterance
-        y = self.dec.recognize_beam(hs[0], None, trans_args, char_list, rnnlm)
+            # 2. decoder
+            # decode the first utterance
+            y = self.dec.recognize_beam(hs[0], None, trans_args, char_list, rnnlm)
 
         if prev:
             self.train()
@@ -328,21 +324,22 @@ class E2E(MTInterface, torch.nn.Module):
         prev = self.training
         self.eval()
 
-        # 1. Encoder
-        if self.multilingual:
-            ilens = np.fromiter((len(xx[1:]) for xx in xs), dtype=np.int64)
-            hs = [to_device(self, torch.from_numpy(xx[1:])) for xx in xs]
-        else:
+        with torch.inference_mode():
+            # 1. Encoder
+            # the source language IDs are removed for multilingual models
+            if self.multilingual:
+                xs = [xx[1:] for xx in xs]
             ilens = np.fromiter((len(xx) for xx in xs), dtype=np.int64)
-            hs = [to_device(self, torch.from_numpy(xx)) for xx in xs]
-        xpad = pad_list(hs, self.pad)
-        hs_pad, hlens, _ = self.enc(self.dropout(self.embed(xpad)), ilens)
+            hs = [torch.from_numpy(xx) for xx in xs]
+            # pad on CPU so that the batch is sent to the device at once
+            xpad = to_device(self, pad_list(hs, self.pad))
+            hs_pad, hlens, _ = self.enc(self.dropout(self.embed(xpad)), ilens)
 
-        # 2. Decoder
-        hlens = torch.tensor(list(map(int, hlens)))  # make sure hlens is tensor
-        y = self.dec.recognize_beam_batch(
-            hs_pad, hlens, None, trans_args, char_list, rnnlm
-        )
+            # 2. Decoder
+            hlens = torch.tensor(list(map(int, hlens)))  # make sure hlens is tensor
+            y = self.dec.recognize_beam_batch(
+                hs_pad, hlens, None, trans_args, char_list, rnnlm
+            )
 
         if prev:
             self.train()
@@ -360,7 +357,7 @@ class E2E(MTInterface, torch.nn.Module):
         :rtype: float ndarray
         """
         self.eval()
-        with torch.no_grad():
+        with torch.inference_mode():
             # 1. Encoder
             xs_pad, ys_pad = self.target_language_biasing(xs_pad, ilens, ys_pad)
             hpad, hlens, _ = self.enc(self.dropout(self.embed(xs_pad)), ilens)
@@ -249,14 +249,9 @@ class E2E(MTInterface, torch.nn.Module):
         assert isinstance(x, list)
 
         # make a utt list (1) to use the same interface for encoder
-        if self.multilingual:
-            x = to_device(
-                self, torch.from_numpy(np.fromiter(map(int, x[0][1:]), dtype=np.int64))
-            )
-        else:
-            x = to_device(
-                self, torch.from_numpy(np.fromiter(map(int, x[0]), dtype=np.int64))
-            )
+        # the source language ID is removed for multilingual models
+        src = x[0][1:] if self.multilingual else x[0]
+        x = to_device(self, torch.from_numpy(np.array(src, dtype=np.int64)))
 
         logging.info("input lengths: " + str(x.size(0)))
         xs_pad = x.unsqueeze(0)
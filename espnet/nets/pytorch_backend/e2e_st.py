@@ -335,13 +335,13 @@ class E2E(STInterface, torch.nn.Module):
             list_of_refs = []
             hyps = []
             y_hats = [nbest_hyp[0]["yseq"][1:-1] for nbest_hyp in nbest_hyps]
+            # convert the references at once, not element by element
+            y_trues = ys_pad.tolist()
             for i, y_hat in enumerate(y_hats):
-                y_true = ys_pad[i]
+                y_true = y_trues[i]
 
                 seq_hat = [self.char_list[int(idx)] for idx in y_hat if int(idx) != -1]
-                seq_true = [
-                    self.char_list[int(idx)] for idx in y_true if int(idx) != -1
-                ]
+                seq_true = [self.char_list[idx] for idx in y_true if idx != -1]
                 seq_hat_text = "".join(seq_hat).replace(self.trans_args.space, " ")
                 seq_hat_text = seq_hat_text.replace(self.trans_args.blank, "")
                 seq_true_text = "".join(seq_true).replace(self.trans_args.space, " ")
@@ -22,9 +22,7 @@ def lecun_normal_init_parameters(module):
             data.normal_(0, stdv)
         elif data.dim() in (3, 4):
             # conv weight
-            n = data.size(1)
-            for k in data.size()[2:]:
-                n *= k
+            n = data[0].numel()
             stdv = 1.0 / math.sqrt(n)
             data.normal_(0, stdv)
         else:
@@ -7,6 +7,7 @@
 """Positionwise feed forward layer definition."""
 
 import torch
+from torch.utils.checkpoint import checkpoint
 
 
 class PositionwiseFeedForward(torch.nn.Module):
@@ -16,17 +17,32 @@ class PositionwiseFeedForward(torch.nn.Module):
         idim (int): Input dimenstion.
         hidden_units (int): The number of hidden units.
         dropout_rate (float): Dropout rate.
+        use_checkpoint (bool): Whether to recompute the hidden activations in
+            backward instead of keeping them in memory during training.
 
     """
 
-    def __init__(self, idim, hidden_units, dropout_rate, activation=torch.nn.ReLU()):
+    def __init__(
+        self,
+        idim,
+        hidden_units,
+        dropout_rate,
+        activation=torch.nn.ReLU(),
+        use_checkpoint=False,
+    ):
         """Construct an PositionwiseFeedForward object."""
         super(PositionwiseFeedForward, self).__init__()
         self.w_1 = torch.nn.Linear(idim, hidden_units)
         self.w_2 = torch.nn.Linear(hidden_units, idim)
         self.dropout = torch.nn.Dropout(dropout_rate)
         self.activation = activation
+        self.use_checkpoint = use_checkpoint
 
     def forward(self, x):
         """Forward function."""
+        if self.use_checkpoint and self.training and torch.is_grad_enabled():
+            return checkpoint(self._forward, x, use_reentrant=False)
+        return self._forward(x)
+
+    def _forward(self, x):
         return self.w_2(self.dropout(self.activation(self.w_1(x))))
@@ -125,7 +125,7 @@ class CTCPrefixScorer(BatchPartialScorerInterface):
         )
         return self.impl(y, batch_state, ids)
 
-    def extend_prob(self, x: torch.Tensor):
+    def extend_prob(self, x: torch.Tensor, start: int = 0):
         """Extend probs for decoding.
 
         This extension is for streaming decoding
@@ -133,10 +133,12 @@ class CTCPrefixScorer(BatchPartialScorerInterface):
 
         Args:
             x (torch.Tensor): The encoded feature tensor
+            start (int): The number of frames of x given in the previous calls.
+                The probs of these frames are not computed again.
 
         """
-        logp = self.ctc.log_softmax(x.unsqueeze(0))
-        self.impl.extend_prob(logp)
+        logp = self.ctc.log_softmax(x[start:].unsqueeze(0))
+        self.impl.extend_prob(logp, start)
 
     def extend_state(self, state):
         """Extend state for decoding.
@@ -33,7 +33,7 @@ class LengthBonus(BatchScorerInterface):
                 and None
 
         """
-        return torch.tensor([1.0], device=x.device, dtype=x.dtype).expand(self.n), None
+        return torch.ones(1, device=x.device, dtype=x.dtype).expand(self.n), None
 
     def batch_score(
         self, ys: torch.Tensor, states: List[Any], xs: torch.Tensor
@@ -53,8 +53,6 @@ class LengthBonus(BatchScorerInterface):
 
         """
         return (
-            torch.tensor([1.0], device=xs.device, dtype=xs.dtype).expand(
-                ys.shape[0], self.n
-            ),
+            torch.ones(1, device=xs.device, dtype=xs.dtype).expand(ys.shape[0], self.n),
             None,
         )
@@ -58,6 +58,8 @@ class TransformerEncoder(AbsEncoder):
         positionwise_layer_type: linear of conv1d
         positionwise_conv_kernel_size: kernel size of positionwise conv1d layer
         padding_idx: padding_idx for input_layer=embed
+        positionwise_checkpoint: whether to recompute the hidden activations of
+            the linear positionwise layer in backward to save memory
     """
 
     @typechecked
@@ -83,6 +85,7 @@ class TransformerEncoder(AbsEncoder):
         layer_drop_rate: float = 0.0,
         qk_norm: bool = False,
         use_flash_attn: bool = True,
+        positionwise_checkpoint: bool = False,
     ):
         super().__init__()
         self._output_size = output_size
@@ -132,6 +135,10 @@ class TransformerEncoder(AbsEncoder):
                 linear_units,
                 dropout_rate,
             )
+            positionwise_layer_kwargs = dict(
+                activation=torch.nn.ReLU(),
+                use_checkpoint=positionwise_checkpoint,
+            )
         elif positionwise_layer_type == "conv1d":
             positionwise_layer = MultiLayeredConv1d
             positionwise_layer_args = (
@@ -140,6 +147,7 @@ class TransformerEncoder(AbsEncoder):
                 positionwise_conv_kernel_size,
                 dropout_rate,
             )
+            positionwise_layer_kwargs = {}
         elif positionwise_layer_type == "conv1d-linear":
             positionwise_layer = Conv1dLinear
             positionwise_layer_args = (
@@ -148,6 +156,7 @@ class TransformerEncoder(AbsEncoder):
                 positionwise_conv_kernel_size,
                 dropout_rate,
             )
+            positionwise_layer_kwargs = {}
         else:
             raise NotImplementedError("Support only linear or conv1d.")
 
@@ -176,7 +185,9 @@ class TransformerEncoder(AbsEncoder):
                     False,
                     False,
                 ),
-                positionwise_layer(*positionwise_layer_args),
+                positionwise_layer(
+                    *positionwise_layer_args, **positionwise_layer_kwargs
+                ),
                 dropout_rate,
                 normalize_before,
                 concat_after,
@@ -0,0 +1,174 @@
+import importlib.util
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+import soundfile
+
+from espnet2.fileio.vad_scp import VADScpReader
+
+SCRIPT = (
+    Path(__file__).parents[2] / "egs2/TEMPLATE/asr1/pyscripts/audio/format_wav_scp.py"
+)
+
+
+@pytest.fixture(scope="module")
+def format_wav_scp():
+    spec = importlib.util.spec_from_file_location("format_wav_scp", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    # typeguard and numba look the module up by name
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture()
+def recordings(tmp_path):
+    rng = np.random.RandomState(0)
+    fs = 8000
+    arrays = {}
+    with open(tmp_path / "wav.scp", "w") as f:
+        for i in range(3):
+            recodeid = "rec{}".format(i)
+            arrays[recodeid] = rng.randint(-(2**15), 2**15, fs * 4, dtype=np.int16)
+            path = tmp_path / "{}.wav".format(recodeid)
+            soundfile.write(path, arrays[recodeid], fs)
+            f.write("{} {}\n".format(recodeid, path))
+    # segments of the recordings are interleaved
+    segments = []
+    for st in np.arange(0, 4, 0.5):
+        for recodeid in arrays:
+            segments.append((recodeid, st, st + 0.75 if st < 3.5 else -1))
+    with open(tmp_path / "segments", "w") as f:
+        for recodeid, st, et in segments:
+            f.write(
+                "{}-{:04d} {} {} {}\n".format(
+                    recodeid, int(st * 100), *(recodeid, st, et)
+                )
+            )
+    return tmp_path, arrays, fs
+
+
+def expected_segments(root, arrays, fs):
+    out = {}
+    with open(root / "segments") as f:
+        for line in f:
+            uttid, recodeid, st, et = line.split()
+            array = soundfile.read(root / "{}.wav".format(recodeid))[0]
+            st, et = float(st), float(et)
+            if et == -1:
+                out[uttid] = array[int(st * fs) :]
+            else:
+                out[uttid] = array[int(st * fs) : int(et * fs)]
+    return out
+
+
+@pytest.mark.parametrize("max_open_files", [1, 64])
+def test_segments_extractor_seek(format_wav_scp, recordings, max_open_files):
+    root, arrays, fs = recordings
+    extractor = format_wav_scp.SegmentsExtractor(
+        str(root / "wav.scp"),
+        segments=str(root / "segments"),
+        max_open_files=max_open_files,
+    )
+    expected = expected_segments(root, arrays, fs)
+    results = list(extractor.generator())
+    assert [utt for utt, *_ in results] == list(expected)
+    for utt, (array, rate), _, _ in results:
+        assert rate == fs
+        np.testing.assert_array_equal(array, expected[utt])
+
+
+@pytest.mark.parametrize("max_cache_bytes", [1, 512 * 1024**2])
+def test_segments_extractor_cache(format_wav_scp, recordings, max_cache_bytes):
+    root, arrays, fs = recordings
+    # pipe inputs are not seekable, they are decoded in full and cached
+    with open(root / "wav.scp", "w") as f:
+        for recodeid in arrays:
+            f.write("{} cat {} |\n".format(recodeid, root / (recodeid + ".wav")))
+    extractor = format_wav_scp.SegmentsExtractor(
+        str(root / "wav.scp"),
+        segments=str(root / "segments"),
+        max_cache_bytes=max_cache_bytes,
+    )
+    expected = expected_segments(root, arrays, fs)
+    for utt, (array, rate), _, _ in extractor.generator():
+        assert rate == fs
+        np.testing.assert_array_equal(array, expected[utt])
+
+
+@pytest.mark.parametrize("size", [0, 1, 3])
+def test_prefetch(format_wav_scp, size):
+    assert list(format_wav_scp.prefetch(range(10), size)) == list(range(10))
+
+
+def test_prefetch_error(format_wav_scp):
+    def generator():
+        yield 0
+        raise RuntimeError("read error")
+
+    items = format_wav_scp.prefetch(generator(), 2)
+    assert next(items) == 0
+    with pytest.raises(RuntimeError, match="read error"):
+        next(items)
+
+
+def test_prefetch_consumer_error(format_wav_scp):
+    closed = []
+
+    def generator():
+        try:
+            for i in range(100):
+                yield i
+        finally:
+            closed.append(threading.current_thread())
+
+    with pytest.raises(ValueError):
+        for i in format_wav_scp.prefetch(generator(), 2):
+            if i == 3:
+                raise ValueError
+    # the producer is stopped and the generator closed in its own thread
+    assert len(closed) == 1
+    assert closed[0] is not threading.current_thread()
+    assert not closed[0].is_alive()
+
+
+def vad_trim_ref(vad_reader, uttid, wav, fs):
+    vad_info = vad_reader[uttid]
+    total_length = sum(int((time[1] - time[0]) * fs) for time in vad_info)
+    new_wav = np.zeros((total_length,) + wav.shape[1:], dtype=wav.dtype)
+    start_frame = 0
+    for time in vad_info:
+        duration = int((time[1] - time[0]) * fs)
+        orig_start_frame = int(time[0] * fs)
+        orig_end_frame = orig_start_frame + duration
+
+        end_frame = start_frame + duration
+        new_wav[start_frame:end_frame] = wav[orig_start_frame:orig_end_frame]
+
+        start_frame = end_frame
+
+    return new_wav
+
+
+@pytest.mark.parametrize("use_numba", [True, False])
+@pytest.mark.parametrize("shape", [(16000,), (16000, 2)])
+def test_vad_trim(format_wav_scp, monkeypatch, tmp_path, use_numba, shape):
+    if use_numba:
+        if format_wav_scp._vad_gather is None:
+            pytest.skip("numba is not installed")
+    else:
+        monkeypatch.setattr(format_wav_scp, "_vad_gather", None)
+    with open(tmp_path / "vad.scp", "w") as f:
+        f.write("utt1 0.0:0.1234 0.2:0.5 0.55:0.9999\n")
+        f.write("utt2 0.3333:0.6667\n")
+    vad_reader = VADScpReader(str(tmp_path / "vad.scp"))
+    wav = np.random.RandomState(0).randn(*shape).astype(np.float32)
+    fs = 16000
+    for uttid in ("utt1", "utt2"):
+        trimmed = format_wav_scp.vad_trim(vad_reader, uttid, wav, fs)
+        expected = vad_trim_ref(vad_reader, uttid, wav, fs)
+        assert trimmed.dtype == expected.dtype
+        np.testing.assert_array_equal(trimmed, expected)
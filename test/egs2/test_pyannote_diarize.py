@@ -0,0 +1,123 @@
+import importlib.util
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import torch
+
+pytest.importorskip("pyannote.audio")
+from pyannote.core import Annotation, Segment  # noqa: E402
+
+SCRIPT = (
+    Path(__file__).parents[2] / "egs2/chime8_task1/diar_asr1/local/pyannote_diarize.py"
+)
+
+
+@pytest.fixture(scope="module")
+def pyannote_diarize():
+    spec = importlib.util.spec_from_file_location("pyannote_diarize", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def split_maxlen_ref(utt_group, min_len=10):
+    out = []
+    stack = []
+    for utt in utt_group:
+        if not stack or (utt.end - stack[0].start) < min_len:
+            stack.append(utt)
+            continue
+
+        out.append(Segment(stack[0].start, stack[-1].end))
+        stack = [utt]
+
+    if len(stack):
+        out.append(Segment(stack[0].start, stack[-1].end))
+
+    return out
+
+
+def merge_closer_ref(annotation, delta=1.0, max_len=60, min_len=10):
+    name = annotation.uri
+    speakers = annotation.labels()
+    new_annotation = Annotation(uri=name)
+    for spk in speakers:
+        c_segments = sorted(annotation.label_timeline(spk), key=lambda x: x.start)
+        stack = []
+        for seg in c_segments:
+            if not stack or abs(stack[-1].end - seg.start) < delta:
+                stack.append(seg)
+                continue
+
+            if (stack[-1].end - stack[0].start) > max_len:
+                for sub_seg in split_maxlen_ref(stack, min_len):
+                    new_annotation[sub_seg] = spk
+                stack = [seg]
+            else:
+                new_annotation[Segment(stack[0].start, stack[-1].end)] = spk
+                stack = [seg]
+
+        if len(stack):
+            new_annotation[Segment(stack[0].start, stack[-1].end)] = spk
+
+    return new_annotation
+
+
+def random_annotation(rng, n_speakers=3, n_segments=200):
+    annotation = Annotation(uri="session")
+    for spk in range(n_speakers):
+        # non-overlapping segments of each speaker, with both short and long gaps
+        durations = rng.uniform(0.1, 8.0, n_segments)
+        gaps = rng.choice([0.0, 0.3, 0.9, 1.5, 4.0], n_segments)
+        starts = np.cumsum(gaps + np.concatenate([[0.0], durations[:-1]]))
+        for start, duration in zip(starts, durations):
+            annotation[Segment(start, start + duration)] = "spk{}".format(spk)
+    return annotation
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize(
+    "delta, max_len, min_len", [(1.0, 60, 10), (0.5, 20, 5), (2.0, 10, 10)]
+)
+def test_merge_closer(pyannote_diarize, seed, delta, max_len, min_len):
+    annotation = random_annotation(np.random.RandomState(seed))
+    merged = pyannote_diarize.merge_closer(annotation, delta, max_len, min_len)
+    expected = merge_closer_ref(annotation, delta, max_len, min_len)
+    assert merged.to_rttm() == expected.to_rttm()
+
+
+class DummyInference:
+    duration = 2.0
+    step = 0.5
+    batch_size = 4
+
+    def __init__(self, sample_rate):
+        self.model = SimpleNamespace(audio=SimpleNamespace(sample_rate=sample_rate))
+        self.window_sizes = []
+
+    def infer(self, chunks):
+        self.window_sizes.append(chunks.shape[-1])
+        # (batch_size, num_frames, num_speakers)
+        return np.zeros((len(chunks), 10, 3), dtype=np.float32)
+
+
+@pytest.mark.parametrize("sample_rate", [8000, 16000, 44100])
+@pytest.mark.parametrize("fixed_batch_size", [False, True])
+def test_get_multichannel_segmentations(
+    pyannote_diarize, sample_rate, fixed_batch_size
+):
+    # 5 seconds of 2 channels, the segmentation model runs at 16 kHz
+    inference = DummyInference(16000)
+    pipeline = SimpleNamespace(_segmentation=inference)
+    waveforms = torch.randn(2, 5 * sample_rate)
+    segmentations = pyannote_diarize.get_multichannel_segmentations(
+        pipeline, waveforms, sample_rate, fixed_batch_size
+    )
+    # chunks are extracted at the model sample rate, whatever the input rate
+    assert set(inference.window_sizes) == {2 * 16000}
+    # 7 chunks of 2 seconds every 0.5 seconds cover the 5 seconds
+    assert segmentations.data.shape == (7, 10, 3, 2)
+    assert segmentations.sliding_window.duration == 2.0
+    assert segmentations.sliding_window.step == 0.5
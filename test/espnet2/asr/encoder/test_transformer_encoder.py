@@ -51,6 +51,29 @@ def test_Encoder_forward_backward(
     y.sum().backward()
 
 
+def test_Encoder_positionwise_checkpoint():
+    torch.manual_seed(0)
+    encoder = TransformerEncoder(20, output_size=40, num_blocks=2, dropout_rate=0.0)
+    encoder_ckpt = TransformerEncoder(
+        20,
+        output_size=40,
+        num_blocks=2,
+        dropout_rate=0.0,
+        positionwise_checkpoint=True,
+    )
+    encoder_ckpt.load_state_dict(encoder.state_dict())
+    x = torch.randn(2, 10, 20)
+    x_lens = torch.LongTensor([10, 8])
+    results = []
+    for enc in (encoder, encoder_ckpt):
+        xi = x.clone().requires_grad_(True)
+        y, _, _ = enc(xi, x_lens)
+        y.sum().backward()
+        results.append([y, xi.grad] + [p.grad for p in enc.parameters()])
+    for t_ckpt, t in zip(results[1], results[0]):
+        torch.testing.assert_close(t_ckpt, t)
+
+
 def test_encoder_invalid_interctc_layer_idx():
     with pytest.raises(AssertionError):
         TransformerEncoder(
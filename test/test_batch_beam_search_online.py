@@ -0,0 +1,40 @@
+import torch
+
+from espnet.nets.batch_beam_search_online import detect_eos_and_repetition
+
+
+def test_detect_eos_and_repetition():
+    eos = 9
+    yseq = torch.tensor(
+        [
+            [0, 1, 2, 3],  # running, no repetition
+            [0, 1, 2, 2],  # running, last token repeated
+            [0, 1, 2, 9],  # ended with <eos>
+            [0, 9, 3, 9],  # ended with <eos>, also seen before
+            [0, 3, 1, 3],  # running, repeating an earlier token
+        ]
+    )
+    length = torch.tensor([4, 4, 4, 4, 4])
+    is_eos, is_repeated = detect_eos_and_repetition(yseq, length, eos)
+    assert is_eos.tolist() == [False, False, True, True, False]
+    assert is_repeated.tolist() == [False, True, False, False, True]
+
+
+def test_detect_eos_and_repetition_length():
+    # <eos> is looked up at length - 1, not in the last column
+    eos = 9
+    yseq = torch.tensor([[0, 9, 0], [0, 1, 9]])
+    length = torch.tensor([2, 2])
+    is_eos, is_repeated = detect_eos_and_repetition(yseq, length, eos)
+    assert is_eos.tolist() == [True, False]
+    assert is_repeated.tolist() == [False, False]
+
+
+def test_detect_eos_and_repetition_disabled():
+    yseq = torch.tensor([[0, 1, 2, 2], [0, 1, 2, 9]])
+    length = torch.tensor([4, 4])
+    is_eos, is_repeated = detect_eos_and_repetition(
+        yseq, length, 9, check_repetition=False
+    )
+    assert is_eos.tolist() == [False, True]
+    assert is_repeated is None
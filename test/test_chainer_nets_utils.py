@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("chainer")
+
+from espnet.nets.chainer_backend.nets_utils import get_topk  # noqa: E402
+
+
+@pytest.mark.parametrize("k", [1, 3, 10, 20])
+@pytest.mark.parametrize("ties", [False, True])
+def test_get_topk(k, ties):
+    rng = np.random.RandomState(0)
+    if ties:
+        x = rng.randint(0, 4, (3, 10)).astype(np.float32)
+    else:
+        x = rng.randn(3, 10).astype(np.float32)
+    scores, ids = get_topk(np, x, k, axis=1)
+    for row, row_scores, row_ids in zip(x, scores, ids):
+        expected = np.argsort(row, kind="stable")[::-1][:k]
+        np.testing.assert_array_equal(row_ids, expected)
+        np.testing.assert_array_equal(row_scores, row[expected])
+
+
+def test_get_topk_axis():
+    x = np.random.RandomState(0).randint(0, 4, (2, 10, 3)).astype(np.float32)
+    scores, ids = get_topk(np, x, 4, axis=1)
+    expected = np.argsort(x, axis=1, kind="stable")[:, ::-1][:, :4]
+    np.testing.assert_array_equal(ids, expected)
+    np.testing.assert_array_equal(scores, np.take_along_axis(x, expected, axis=1))
@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("chainer")
+
+from espnet.nets.chainer_backend.transformer.training import (  # noqa: E402
+    CustomConverter,
+)
+
+
+def test_custom_converter():
+    xs = [np.random.randn(n, 3).astype(np.float32) for n in (5, 2, 4)]
+    ys = [np.array([1, 2]), np.array([3])]
+    xs_pad, ilens, ys_out = CustomConverter()([(xs, ys)], -1)
+    # the lengths are those of the inputs, not of the padded rows
+    assert ilens.dtype == np.int32
+    np.testing.assert_array_equal(ilens, [5, 2, 4])
+    assert xs_pad.shape == (3, 5, 3)
+    for x, x_pad in zip(xs, xs_pad):
+        np.testing.assert_array_equal(x_pad[: len(x)], x)
+        assert (x_pad[len(x) :] == -1).all()
+    assert ys_out is ys
@@ -0,0 +1,59 @@
+import pytest
+import torch
+
+from espnet2.asr.ctc import CTC
+from espnet.nets.scorers.ctc import CTCPrefixScorer
+
+odim = 5
+eos = 4
+
+
+@pytest.fixture()
+def ctc():
+    torch.manual_seed(0)
+    return CTC(odim, 8).eval()
+
+
+def assert_same_impl(scorer, ref):
+    impl, ref_impl = scorer.impl, ref.impl
+    assert impl.input_length == ref_impl.input_length
+    assert impl.end_frames.tolist() == ref_impl.end_frames.tolist()
+    torch.testing.assert_close(impl.x, ref_impl.x)
+    # scores of the first labels after <sos>
+    y = [torch.tensor([eos])]
+    scores, _ = impl(y, None)
+    ref_scores, _ = ref_impl(y, None)
+    torch.testing.assert_close(scores, ref_scores)
+
+
+@pytest.mark.parametrize("ends", [[4, 7, 12], [1, 2, 3, 12], [4, 4, 12]])
+def test_extend_prob_incremental(ctc, ends):
+    x = torch.randn(ends[-1], 8)
+    with torch.no_grad():
+        ref = CTCPrefixScorer(ctc, eos)
+        ref.batch_init_state(x)
+        scorer = CTCPrefixScorer(ctc, eos)
+        scorer.batch_init_state(x[: ends[0]])
+        for start, end in zip(ends[:-1], ends[1:]):
+            scorer.extend_prob(x[:end], start=start)
+    assert_same_impl(scorer, ref)
+
+
+def test_extend_prob_sliding_window(ctc):
+    # with encoded_feat_length_limit, the encoded frames are a sliding window
+    # and start indexes into it, as in BatchBeamSearchOnline
+    x = torch.randn(12, 8)
+    window = x[12 - 6 : 12]  # encoded_feat_length_limit = 6
+    with torch.no_grad():
+        ref = CTCPrefixScorer(ctc, eos)
+        ref.batch_init_state(x[:4])
+        ref.extend_prob(window)
+        scorer = CTCPrefixScorer(ctc, eos)
+        scorer.batch_init_state(x[:4])
+        scorer.extend_prob(window, start=4)
+        # the frames already given are kept, the rest is taken from the window
+        expected = torch.cat(
+            [ctc.log_softmax(x[None, :4])[0], ctc.log_softmax(window[None])[0, 4:]]
+        )
+    assert_same_impl(scorer, ref)
+    torch.testing.assert_close(scorer.impl.x[0, :, 0], expected)
@@ -358,6 +358,28 @@ def test_torch_save_and_load():
         os.remove(tmppath)
 
 
+@pytest.mark.parametrize(
+    "quantize_config, quantize_dtype",
+    [(None, "qint8"), (["Linear", "LSTM"], "qint8"), (["Linear", "LSTM"], "float16")],
+)
+def test_quantized_model_decodable(quantize_config, quantize_dtype):
+    m = importlib.import_module("espnet.nets.pytorch_backend.e2e_mt")
+    mt = importlib.import_module("espnet.mt.pytorch_backend.mt")
+    args = make_arg()
+    model = m.E2E(6, 5, args)
+    model.eval()
+    model = mt.quantize_mt_model(model, quantize_config, quantize_dtype)
+    # only the encoder is quantized
+    for name, quantized in [("embed", False), ("enc", True), ("dec", False)]:
+        modules = getattr(model, name).modules()
+        assert any("quantized" in type(x).__module__ for x in modules) == quantized
+    with torch.no_grad():
+        in_data = np.random.randint(0, 5, (1, 10))
+        model.translate(in_data, args, args.char_list)
+        batch_in_data = np.random.randint(0, 5, (2, 10))
+        model.translate_batch(batch_in_data, args, args.char_list)
+
+
 @pytest.mark.skipif(
     not torch.cuda.is_available() and not chainer.cuda.available, reason="gpu required"
 )